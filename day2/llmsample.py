@@ -8,9 +8,14 @@ Start Ollama service (if not running):
     ollama serve
 """
 
-import ollama
+import itertools
 import json
+import re
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sharedcaches import cached_chat
 
 # Default local model — change if you prefer mistral, phi3, qwen2, etc.
 DEFAULT_MODEL = "llama3"
@@ -18,15 +23,17 @@ DEFAULT_MODEL = "llama3"
 # ---------------------------------------------
 # Basic Completion
 # ---------------------------------------------
-def send_completion(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=300):
+def send_completion(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=300, format=None):
     """
     Sends a prompt to a local Ollama model and returns text output.
+    format="json" asks Ollama for a JSON-only response.
     """
     try:
-        response = ollama.chat(
+        response = cached_chat(
             model=model,
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": temperature, "num_predict": max_tokens}
+            options={"temperature": temperature, "num_predict": max_tokens},
+            format=format
         )
         return response["message"]["content"]
     except Exception as e:
@@ -56,6 +63,83 @@ def classify_review(review):
     return send_completion(prompt, temperature=0.0, max_tokens=20)
 
 
+# ---------------------------------------------
+# Batch Classification
+# ---------------------------------------------
+# Several reviews per prompt: the few-shot preamble is sent once per pack
+# and the model answers with one JSON list of labels.
+packed_template = """
+You are an assistant that classifies movie reviews as Positive or Negative.
+
+Examples:
+Review: "I loved the movie. The story was touching and the acting superb."
+Label: Positive
+
+Review: "Boring, too long, and predictable."
+Label: Negative
+
+Now classify each of the following {count} reviews:
+{reviews}
+
+Respond with JSON only, exactly {count} labels in the same order:
+{{"labels": ["Positive" or "Negative", ...]}}
+"""
+
+LABELS = ("Positive", "Negative")
+BATCH_WORKERS = 4    # concurrent requests (match OLLAMA_NUM_PARALLEL)
+
+
+def parse_label(text):
+    """'Label: Positive.' -> 'Positive'; anything unrecognised is returned stripped."""
+    match = re.search(r"\b(positive|negative)\b", text, re.IGNORECASE)
+    return match.group(1).capitalize() if match else text.strip()
+
+
+def classify_pack(reviews):
+    """Labels for a list of reviews from one prompt; falls back to one call per review."""
+    if len(reviews) == 1:
+        return [parse_label(classify_review(reviews[0]))]
+
+    numbered = "\n".join(f'{i}. Review: "{review}"' for i, review in enumerate(reviews, start=1))
+    prompt = packed_template.format(count=len(reviews), reviews=numbered)
+    output = send_completion(prompt, temperature=0.0, max_tokens=10 * len(reviews) + 20, format="json")
+    try:
+        labels = [parse_label(label) for label in json.loads(output)["labels"]]
+        if len(labels) == len(reviews) and all(label in LABELS for label in labels):
+            return labels
+    except (ValueError, KeyError, TypeError):
+        pass
+    # Malformed or miscounted answer: classify this pack one review at a time
+    return [parse_label(classify_review(review)) for review in reviews]
+
+
+def classify_reviews(reviews, max_workers=BATCH_WORKERS, pack_size=1):
+    """
+    Classifies an iterable of reviews concurrently and yields their labels
+    in input order, as soon as each one (and everything before it) is done.
+
+    At most max_workers requests run at once and only 2 * max_workers packs
+    are in flight, so an arbitrarily long (or lazy) iterable is fine.
+    pack_size > 1 sends that many reviews per prompt with a JSON answer.
+    """
+    reviews = iter(reviews)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            while True:
+                pack = list(itertools.islice(reviews, pack_size))
+                if pack:
+                    pending.append(pool.submit(classify_pack, pack))
+                if pending and (not pack or len(pending) >= 2 * max_workers):
+                    yield from pending.popleft().result()
+                elif not pack:
+                    break
+        finally:
+            # The caller stopped early: do not start the packs still queued
+            for future in pending:
+                future.cancel()
+
+
 # ---------------------------------------------
 # Demo
 # ---------------------------------------------
@@ -65,5 +149,18 @@ if __name__ == "__main__":
     review = "The plot was amazing and the visuals were stunning."
     print("\nFew-shot classification:")
     print(classify_review(review))
+
+    reviews = [
+        "The plot was amazing and the visuals were stunning.",
+        "I walked out halfway through, what a waste of time.",
+        "A heartfelt story with brilliant performances.",
+        "The dialogue was clumsy and the ending made no sense.",
+        "Funny, clever and beautifully shot.",
+    ]
+    print("\nBatch classification (concurrent, 2 reviews per prompt):")
+    start = time.perf_counter()
+    for text, label in zip(reviews, classify_reviews(reviews, max_workers=4, pack_size=2)):
+        print(f"  {label:<9} {text}")
+    print(f"  {len(reviews)} reviews in {time.perf_counter() - start:.2f}s")
     
    
\ No newline at end of file
@@ -11,6 +11,9 @@ Start Ollama service (if not running):
 import ollama
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sharedcaches import cached_embedding
 
 # Default local model — change if you prefer mistral, phi3, qwen2, etc.
 DEFAULT_MODEL = "llama3"
@@ -57,10 +60,10 @@ def get_embedding(text, model="nomic-embed-text"):
     """
     Uses Ollama's embedding models (e.g., nomic-embed-text) to get vector embeddings.
     Pull model first: ollama pull nomic-embed-text
+    Vectors are cached on disk, so repeated texts never hit the model again.
     """
     try:
-        res = ollama.embeddings(model=model, prompt=text)
-        return res["embedding"]
+        return cached_embedding(text, model=model)
     except Exception as e:
         print("Embedding error:", e)
         return None
@@ -79,13 +82,95 @@ def cosine_similarity(a, b):
 # ---------------------------------------------
 # Evaluate Prompts (A/B Testing)
 # ---------------------------------------------
-def compare_prompts(prompt_a, prompt_b, test_inputs, model=DEFAULT_MODEL):
-    results = []
-    for text in test_inputs:
-        out_a = send_completion(prompt_a.format(text), model=model)
-        out_b = send_completion(prompt_b.format(text), model=model)
-        results.append({"input": text, "A": out_a.strip(), "B": out_b.strip()})
-    return results
+EVAL_WORKERS = 4   # concurrent requests (match OLLAMA_NUM_PARALLEL)
+
+
+def timed_completion(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=300):
+    """
+    Like send_completion(), but also returns wall-clock latency and Ollama's
+    own counters: tokens generated (eval_count), prompt tokens and tokens/sec.
+    """
+    start = time.perf_counter()
+    try:
+        response = ollama.chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": temperature, "num_predict": max_tokens}
+        )
+    except Exception as e:
+        return {"output": f"Error: {e}", "error": True, "latency": time.perf_counter() - start,
+                "eval_count": 0, "prompt_eval_count": 0, "eval_seconds": 0.0, "tokens_per_sec": 0.0}
+
+    eval_count = response.get("eval_count") or 0
+    eval_seconds = (response.get("eval_duration") or 0) / 1e9   # Ollama reports nanoseconds
+    return {
+        "output": response["message"]["content"].strip(),
+        "error": False,
+        "latency": time.perf_counter() - start,
+        "eval_count": eval_count,
+        "prompt_eval_count": response.get("prompt_eval_count") or 0,
+        "eval_seconds": eval_seconds,
+        "tokens_per_sec": eval_count / eval_seconds if eval_seconds else 0.0,
+    }
+
+
+def evaluate_prompts(prompt_a, prompt_b, test_inputs, model=DEFAULT_MODEL,
+                     max_workers=EVAL_WORKERS, temperature=0.7, max_tokens=300):
+    """
+    Runs both prompt variants over every input concurrently (bounded pool).
+    A and B calls are interleaved so both see the same server load.
+    Returns [{"input": text, "A": call stats, "B": call stats}, ...] in input order.
+    """
+    test_inputs = list(test_inputs)
+    calls = [(prompt.format(text), variant) for text in test_inputs
+             for variant, prompt in (("A", prompt_a), ("B", prompt_b))]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        stats = list(pool.map(lambda call: timed_completion(call[0], model, temperature, max_tokens), calls))
+
+    return [{"input": text, "A": stats[2 * i], "B": stats[2 * i + 1]} for i, text in enumerate(test_inputs)]
+
+
+def summarize_evaluation(results):
+    """Per-variant latency percentiles, token counts and throughput."""
+    summary = {}
+    for variant in ("A", "B"):
+        calls = [r[variant] for r in results]
+        ok = [c for c in calls if not c["error"]]
+        latencies = sorted(c["latency"] for c in ok)
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+        tokens = sum(c["eval_count"] for c in ok)
+        eval_seconds = sum(c["eval_seconds"] for c in ok)
+        summary[variant] = {
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "latency_mean_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "latency_p50_s": round(pick(0.50), 3),
+            "latency_p95_s": round(pick(0.95), 3),
+            "tokens_total": tokens,
+            "tokens_mean": round(tokens / len(ok), 1) if ok else 0.0,
+            "prompt_tokens_mean": round(sum(c["prompt_eval_count"] for c in ok) / len(ok), 1) if ok else 0.0,
+            "tokens_per_sec": round(tokens / eval_seconds, 1) if eval_seconds else 0.0,
+        }
+    return summary
+
+
+def write_report(results, path="ab_report.json"):
+    """Writes the summary plus every input's outputs and stats as JSON; prints the summary table."""
+    summary = summarize_evaluation(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "results": results}, f, indent=2)
+
+    print(f"{'metric':<20}{'A':>12}{'B':>12}")
+    for metric in summary["A"]:
+        print(f"{metric:<20}{summary['A'][metric]:>12}{summary['B'][metric]:>12}")
+    print(f"Report written to {path}")
+    return summary
+
+
+def compare_prompts(prompt_a, prompt_b, test_inputs, model=DEFAULT_MODEL, max_workers=EVAL_WORKERS):
+    """Outputs only: [{"input", "A", "B"}]. Use evaluate_prompts() for latency and token stats."""
+    results = evaluate_prompts(prompt_a, prompt_b, test_inputs, model=model, max_workers=max_workers)
+    return [{"input": r["input"], "A": r["A"]["output"], "B": r["B"]["output"]} for r in results]
 
 
 # ---------------------------------------------
@@ -96,5 +181,15 @@ if __name__ == "__main__":
 
     print("\nChain-of-thought demo:")
     print(chain_of_thought_example())
+
+    print("\nA/B prompt evaluation:")
+    results = evaluate_prompts(
+        "Summarize in one sentence: {}",
+        "You are a concise editor. Give a one-sentence summary of the text below.\n\n{}",
+        ["Ollama runs large language models locally.",
+         "FAISS is a library for efficient similarity search over dense vectors.",
+         "Few-shot prompting shows the model worked examples before the real task."],
+    )
+    write_report(results)
     
 
@@ -8,10 +8,11 @@ Start Ollama service (if not running):
     ollama serve
 """
 
-import ollama
 import json
 import time
 
+from sharedcaches import cached_chat, cached_embedding
+
 # Default local model — change if you prefer mistral, phi3, qwen2, etc.
 DEFAULT_MODEL = "llama3"
 
@@ -23,7 +24,7 @@ def send_completion(prompt, model=DEFAULT_MODEL, temperature=0.7, max_tokens=300
     Sends a prompt to a local Ollama model and returns text output.
     """
     try:
-        response = ollama.chat(
+        response = cached_chat(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             options={"temperature": temperature, "num_predict": max_tokens}
@@ -80,10 +81,10 @@ def get_embedding(text, model="nomic-embed-text"):
     """
     Uses Ollama's embedding models (e.g., nomic-embed-text) to get vector embeddings.
     Pull model first: ollama pull nomic-embed-text
+    Vectors are cached on disk, so repeated texts never hit the model again.
     """
     try:
-        res = ollama.embeddings(model=model, prompt=text)
-        return res["embedding"]
+        return cached_embedding(text, model=model)
     except Exception as e:
         print("Embedding error:", e)
         return None
@@ -0,0 +1,208 @@
+"""
+Shared Ollama client for the prompt-pattern scripts.
+
+Every pattern in this folder talks to the same local /api/generate endpoint.
+Instead of calling bare requests.post() (a new TCP connection per call and no
+timeout), they import ollama_chat() from here, which goes through one
+keep-alive requests.Session with a connection pool, timeouts and
+retry-with-backoff.
+
+Usage:
+    from ollamaclient import ollama_chat, ollama_stream
+    answer = ollama_chat("Explain ReAct in one sentence.")
+
+    with ollama_stream("Explain ReAct in one sentence.") as stream:
+        for token in stream:
+            print(token, end="", flush=True)
+    print("\nTime to first token:", stream.ttft)
+"""
+import json
+import re
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- 1. Configuration ---
+OLLAMA_URL = "http://localhost:11434/api/generate"
+MODEL = "llama3"   # or any model you installed via `ollama pull`
+
+CONNECT_TIMEOUT = 5.0     # seconds to open the socket
+READ_TIMEOUT = 300.0      # seconds to wait for the generation to finish
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5      # sleeps 0.5s, 1s, 2s ... between retries
+POOL_SIZE = 10            # keep-alive connections kept open to the server
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# ReAct / tool-use action line, e.g. "Action: calculator[234 * 89]"
+ACTION_PATTERN = re.compile(r"Action:\s*(\w+)\[(.*?)\]")
+ACTION_PREFIX = "Action:"
+
+
+# --- 2. Token Stream ---
+class TokenStream:
+    """
+    Iterates over the tokens of a streamed /api/generate response.
+
+    Timing is exposed as attributes once tokens start arriving:
+    ttft (seconds to the first token), elapsed (seconds until the stream
+    ended), text (everything received so far) and stats (the final "done"
+    chunk with eval_count, eval_duration, ...). Calling close() -- or
+    breaking out of a `with` block -- drops the connection, which makes
+    Ollama stop generating.
+    """
+
+    def __init__(self, response: requests.Response, started: float):
+        self._response = response
+        self._started = started
+        self.ttft = None
+        self.elapsed = None
+        self.text = ""
+        self.stats = {}
+        self.done = False
+
+    def __iter__(self):
+        try:
+            for line in self._response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response", "")
+                if token:
+                    if self.ttft is None:
+                        self.ttft = time.perf_counter() - self._started
+                    self.text += token
+                    yield token
+                if chunk.get("done"):
+                    self.done = True
+                    self.stats = chunk
+                    break
+        finally:
+            self.close()
+
+    def close(self):
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self._started
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 3. Pooled Client ---
+class OllamaClient:
+    """A keep-alive HTTP client for the Ollama /api/generate endpoint."""
+
+    def __init__(self, url: str = OLLAMA_URL, model: str = MODEL,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, backoff_factor: float = BACKOFF_FACTOR,
+                 pool_size: int = POOL_SIZE):
+        self.url = url
+        self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+
+        # POST is not retried by default; generation requests are safe to repeat.
+        # Read errors are not retried: a read timeout means a generation ran for
+        # read_timeout seconds, and repeating it would multiply that wait.
+        retry = Retry(
+            total=max_retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, prompt: str, model: str = None, **options) -> str:
+        """Sends a prompt and returns the full (non-streamed) response text."""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": False
+        }
+        if options:
+            payload["options"] = options
+
+        r = self.session.post(self.url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()["response"]
+
+    def stream(self, prompt: str, model: str = None, **options) -> TokenStream:
+        """Sends a prompt with "stream": True and returns a TokenStream."""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": True
+        }
+        if options:
+            payload["options"] = options
+
+        started = time.perf_counter()
+        r = self.session.post(self.url, json=payload, timeout=self.timeout, stream=True)
+        r.raise_for_status()
+        return TokenStream(r, started)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 4. Module-level Helpers ---
+_default_client = None
+
+def get_client() -> OllamaClient:
+    """Returns the process-wide client, creating it on first use."""
+    global _default_client
+    if _default_client is None:
+        _default_client = OllamaClient()
+    return _default_client
+
+
+def ollama_chat(prompt, model=None, **options):
+    """Drop-in replacement for the per-script ollama_chat() helpers."""
+    return get_client().generate(prompt, model=model, **options)
+
+
+def ollama_stream(prompt, model=None, **options):
+    """Streaming counterpart of ollama_chat(); returns a TokenStream."""
+    return get_client().stream(prompt, model=model, **options)
+
+
+def ollama_chat_until_action(prompt, model=None, **options):
+    """
+    Streams a completion and stops it as soon as a complete
+    `Action: tool[input]` has been emitted.
+
+    Returns (text, match): the text up to the end of the action and the
+    ACTION_PATTERN match, or the full completion and None if the model
+    never produced an action. Anything the model would have written after
+    the action (speculative "Observation:" lines) is never generated.
+    """
+    with ollama_stream(prompt, model=model, **options) as stream:
+        scan_from = 0
+        for _ in stream:
+            text = stream.text
+            match = ACTION_PATTERN.search(text, scan_from)
+            if match:
+                return text[:match.end()], match
+            # Only the latest "Action:" can still turn into a match, so
+            # earlier text never needs to be rescanned.
+            last = text.rfind(ACTION_PREFIX, scan_from)
+            if last == -1:
+                last = len(text) - len(ACTION_PREFIX) + 1
+            scan_from = max(scan_from, last)
+        return stream.text, None
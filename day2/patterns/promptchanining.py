@@ -1,19 +1,4 @@
-
-import requests
-import json
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3"
-
-def ollama_chat(prompt):
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-    r = requests.post(OLLAMA_URL, json=payload)
-    return r.json()["response"]
-
+from ollamaclient import ollama_chat
 
 
 def chain_summarize(text):
@@ -1,17 +1,4 @@
-import requests
-import json
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3"
-
-def ollama_chat(prompt):
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-    r = requests.post(OLLAMA_URL, json=payload)
-    return r.json()["response"]
+from ollamaclient import ollama_chat, ollama_chat_until_action
 
 
 def calculator(expression):
@@ -34,12 +21,11 @@ Your response format:
 Thought: ...
 Action: <tool>[<input>]
 """
-    thoughts = ollama_chat(reasoning_prompt + "\nUser query: " + prompt)
+    # Generation is cut off as soon as a complete Action line is streamed
+    thoughts, match = ollama_chat_until_action(reasoning_prompt + "\nUser query: " + prompt)
     print("LLM Thoughts + Action:\n", thoughts)
 
-    # 2. Extract the action
-    import re
-    match = re.search(r"Action:\s*(\w+)\[(.*?)\]", thoughts)
+    # 2. Dispatch the action parsed from the stream
     if not match:
         return "No tool used. Final answer: " + thoughts
 
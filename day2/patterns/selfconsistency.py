@@ -1,32 +1,73 @@
-import requests
-import json
+from ollamaclient import ollama_stream
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3"   # or any model you installed via `ollama pull`
-
-import requests
-import json
 
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def ollama_chat(prompt):
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-    r = requests.post(OLLAMA_URL, json=payload)
-    return r.json()["response"]
 
+def _sample(prompt, streams, stop, lock):
+    """One streamed sample; returns its text, or None if early exit cut it off."""
+    if stop.is_set():
+        return None
+    # Opened outside the lock: the POST blocks until the first bytes arrive
+    stream = ollama_stream(prompt)
+    with lock:
+        streams.append(stream)
+        if stop.is_set():   # early exit happened while we were connecting
+            stream.close()
+            return None
+    try:
+        with stream:
+            for _ in stream:
+                if stop.is_set():
+                    break
+    except Exception:
+        if stop.is_set():   # connection closed under us by the early exit
+            return None
+        raise
+    return stream.text if stream.done else None
 
-import collections
+def self_consistency(prompt, samples=5, concurrency=None, early_exit=False):
+    """
+    Samples the model `samples` times and returns the majority answer.
 
-def self_consistency(prompt, samples=5):
+    All samples are fired at once on a thread pool capped at `concurrency`
+    workers (default: one per sample, 1 = the old sequential behaviour).
+    With early_exit=True we stop as soon as one answer holds a strict
+    majority of `samples`: samples not yet started are cancelled and the
+    streams still generating are closed, which stops them on the server.
+    """
+    concurrency = concurrency or samples
+    majority = samples // 2 + 1
     answers = []
-    for _ in range(samples):
-        ans = ollama_chat(prompt)
-        answers.append(ans.strip())
+    counter = collections.Counter()
+    streams, stop, lock = [], threading.Event(), threading.Lock()
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [pool.submit(_sample, prompt, streams, stop, lock) for _ in range(samples)]
+        for fut in as_completed(futures):
+            text = fut.result()
+            if text is None:
+                continue
+            ans = text.strip()
+            answers.append(ans)
+            counter[ans] += 1
+            if early_exit and counter[ans] >= majority:
+                print(f"(early exit: {counter[ans]}/{samples} agree after {len(answers)} samples)")
+                break
+    finally:
+        # Drop queued samples and close the open streams: closing the
+        # connection makes Ollama stop generating that sample.
+        with lock:
+            stop.set()
+            for stream in streams:
+                stream.close()
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    counter = collections.Counter(answers)
+    if not counter:
+        raise RuntimeError("No sample completed; nothing to take a majority of.")
     consensus = counter.most_common(1)[0][0]
 
     print("=== All Answers ===")
@@ -39,4 +80,4 @@ def self_consistency(prompt, samples=5):
 
 # Test
 prompt = "A farmer has 17 sheep. All but 9 die. How many are left?"
-self_consistency(prompt)
+self_consistency(prompt, early_exit=True)
@@ -1,22 +1,4 @@
-import requests
-import json
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL = "llama3"   # or any model you installed via `ollama pull`
-
-import requests
-import json
-
-
-def ollama_chat(prompt):
-    payload = {
-        "model": MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
-    r = requests.post(OLLAMA_URL, json=payload)
-    return r.json()["response"]
-
+from ollamaclient import ollama_chat, ollama_chat_until_action
 
 
 def get_weather(city):
@@ -43,12 +25,10 @@ Action: none
 User query: {query}
 """
 
-    plan = ollama_chat(react_prompt)
+    # Generation is cut off as soon as a complete Action line is streamed
+    plan, match = ollama_chat_until_action(react_prompt)
     print("LLM Decision:\n", plan)
 
-    import re
-    match = re.search(r"Action:\s*(\w+)\[(.*?)\]", plan)
-
     if not match:
         return "Could not parse action"
 
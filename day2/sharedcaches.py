@@ -0,0 +1,20 @@
+"""
+Shared caches for the day2 scripts.
+
+The embedding cache and the LLM response cache live with the RAG examples in
+day4. This module puts day4 on the import path once and re-exports what the
+day2 scripts use, so they can write:
+
+    from sharedcaches import cached_chat, cached_embedding
+"""
+import os
+import sys
+
+DAY4_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "day4")
+if DAY4_DIR not in sys.path:
+    sys.path.append(DAY4_DIR)
+
+from embeddingcache import cached_embedding
+from llmcache import cached_chat
+
+__all__ = ["cached_chat", "cached_embedding"]
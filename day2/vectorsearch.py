@@ -0,0 +1,109 @@
+"""
+Vectorized Similarity Search - NumPy Version
+Brute-force retrieval without FAISS: keep every document embedding in one
+pre-normalized float32 matrix, and score a query (or a batch of queries)
+against all of them with a single matrix product. Top-k is picked with
+argpartition, so only the k winners are ever sorted.
+
+Install dependencies:
+    pip install numpy
+Run the benchmark against the pure-Python cosine_similarity in llmsample1.py:
+    python vectorsearch.py
+"""
+
+import time
+
+import numpy as np
+
+
+# ---------------------------------------------
+# Normalization
+# ---------------------------------------------
+def normalize(vectors):
+    """
+    Returns float32 unit-length rows (1-D input gives a 1-D result).
+    Zero vectors stay zero, so they score 0.0 against everything.
+    """
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+# ---------------------------------------------
+# Top-k Search
+# ---------------------------------------------
+def top_k(queries, matrix, k=5, normalized=False):
+    """
+    Cosine top-k of one query (1-D) or a batch of queries (2-D) against
+    `matrix`, whose rows must already be normalized (see normalize()).
+
+    Returns (indices, scores), best first. For a single query both are 1-D;
+    for a batch both have shape (n_queries, k).
+    """
+    single = np.ndim(queries) == 1
+    q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    if not normalized:
+        q = normalize(q)
+
+    scores = q @ matrix.T                       # (n_queries, n_docs)
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        # O(n) selection of the k best, then sort only those k
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    top_scores = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    idx = np.take_along_axis(idx, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    if single:
+        return idx[0], top_scores[0]
+    return idx, top_scores
+
+
+def cosine_similarity(a, b):
+    """Vectorized drop-in for the loop-based cosine_similarity(a, b)."""
+    a, b = normalize(a), normalize(b)
+    return float(a @ b)
+
+
+# ---------------------------------------------
+# Benchmark
+# ---------------------------------------------
+def benchmark(n_docs=10_000, dim=768, k=5, n_queries=10, seed=0):
+    """Times a top-k search with the pure-Python loop vs. the NumPy version."""
+    from llmsample1 import cosine_similarity as loop_cosine_similarity
+
+    rng = np.random.default_rng(seed)
+    docs = rng.standard_normal((n_docs, dim)).astype(np.float32)
+    queries = rng.standard_normal((n_queries, dim)).astype(np.float32)
+    docs_list = docs.tolist()
+
+    start = time.perf_counter()
+    loop_results = []
+    for q in queries.tolist():
+        sims = [loop_cosine_similarity(q, d) for d in docs_list]
+        loop_results.append(sorted(range(n_docs), key=sims.__getitem__, reverse=True)[:k])
+    loop_time = time.perf_counter() - start
+
+    matrix = normalize(docs)   # done once at indexing time
+    start = time.perf_counter()
+    batch_idx, _ = top_k(queries, matrix, k=k)
+    numpy_time = time.perf_counter() - start
+
+    agree = all(list(a) == b for a, b in zip(batch_idx, loop_results))
+    print(f"{n_queries} queries x {n_docs} docs x {dim} dims, k={k}")
+    print(f"  pure Python loop : {loop_time:.3f}s")
+    print(f"  NumPy batch top-k: {numpy_time:.4f}s ({loop_time / numpy_time:.0f}x faster)")
+    print(f"  same top-k results: {agree}")
+    return loop_time, numpy_time
+
+
+# ---------------------------------------------
+# Demo
+# ---------------------------------------------
+if __name__ == "__main__":
+    print("🔹 Vectorized Similarity Search Benchmark")
+    benchmark()
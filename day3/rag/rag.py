@@ -2,9 +2,16 @@ from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.vectorstores import FAISS
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.documents import Document
+import os
+import sys
+
+# The FAISS and embedding cache helpers live with the other RAG examples in day4
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "day4"))
+from faisscache import load_or_build_faiss
+from embeddingcache import CachedEmbeddings
+from llmcache import cache_deterministic
 """
 * **`FAISS` (Facebook AI Similarity Search)**: 
 This is an efficient
@@ -20,8 +27,8 @@ docs = [
 
 # 2. Create Embeddings and Vector Store
 # Use Ollama for embeddings to keep everything local
-embeddings = OllamaEmbeddings(model="llama3") 
-vectorstore = FAISS.from_documents(docs, embeddings)
+embeddings = CachedEmbeddings(OllamaEmbeddings(model="llama3")) 
+vectorstore = load_or_build_faiss(docs, embeddings) # Re-embeds only when docs/model change
 retriever = vectorstore.as_retriever()
 
 # 3. Define the Prompt
@@ -34,7 +41,7 @@ Question: {question}
 """
 RAG is essential for grounding the LLM's answer in specific documents or data, preventing hallucinations. This chain uses a simple in-memory vector store."""
 prompt = ChatPromptTemplate.from_template(template)
-ollama_model = ChatOllama(model="llama3", temperature=0)
+ollama_model = cache_deterministic(ChatOllama(model="llama3", temperature=0))
 
 # 4. Create the RAG Chain
 rag_chain = (
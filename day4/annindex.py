@@ -0,0 +1,214 @@
+"""
+Docstring for agentloop.annindex
+
+Approximate-Nearest-Neighbour FAISS Indexes
+FAISS.from_documents() builds an IndexFlatL2, so every query is an exact scan
+over all N vectors. The helpers here put the same LangChain FAISS store on an
+IVF, HNSW or IVF-PQ index instead, with the usual recall/latency knobs:
+
+    kind    factory string     build knobs            search knobs
+    flat    Flat               -                      -
+    ivf     IVF{nlist},Flat    nlist                  nprobe
+    hnsw    HNSW{M}            M, ef_construction     ef_search
+    ivfpq   IVF{nlist},PQ{m}   nlist, pq_m, pq_bits   nprobe
+
+Independently of the kind, precision="float16" / "int8" (FAISS_PRECISION)
+stores the vectors scalar-quantized, and lossy indexes are wrapped in a
+RescoringIndex that re-ranks rescore * k candidates at full precision (see
+quantizedindex.py).
+
+Set FAISS_INDEX=hnsw (or ivf / ivfpq) to make load_or_build_faiss() and the
+streaming ingestion build that index kind for every pipeline; the kind,
+precision and build knobs become part of the cache key. Corpora below MIN_ANN_VECTORS chunks keep
+the flat index, where an exact scan is already the fastest option. HNSW
+indexes cannot delete vectors, so keep IncrementalIndex stores flat.
+
+Usage:
+    vectorstore = convert_to_ann(FAISS.from_documents(docs, emb), "hnsw", ef_search=64)
+    set_search_params(vectorstore.index, ef_search=128)   # more recall, more latency
+    convert_to_ann(vectorstore, "flat", precision="int8")  # 4x less RAM, rescored
+    python annindex.py                                    # recall@k / latency benchmark
+"""
+import math
+import os
+import time
+
+import faiss
+import numpy as np
+
+from quantizedindex import ENCODINGS, RESCORE_FACTOR, RescoringIndex, is_lossy
+
+# Index kind used by load_or_build_faiss() and index_documents_stream()
+FAISS_INDEX = os.environ.get("FAISS_INDEX", "flat").lower()
+INDEX_KINDS = ("flat", "ivf", "hnsw", "ivfpq")
+FAISS_PRECISION = os.environ.get("FAISS_PRECISION", "float32").lower()
+SEARCH_KNOBS = {"nprobe", "ef_search", "rescore"}   # query-time only, not part of the cache key
+MIN_ANN_VECTORS = 10_000   # below this an exact scan beats an ANN index
+
+# Default knobs
+HNSW_M = 32
+EF_CONSTRUCTION = 40
+EF_SEARCH = 64
+NPROBE = 8
+PQ_BITS = 8
+
+
+# --- 1. Building Indexes ---
+def factory_string(kind: str, dim: int, n: int, nlist: int = None, M: int = HNSW_M,
+                   pq_m: int = None, pq_bits: int = PQ_BITS, precision: str = "float32") -> str:
+    """faiss.index_factory() description for `kind` over n vectors of size dim."""
+    if precision not in ENCODINGS:
+        raise ValueError(f"Unknown precision {precision!r}; expected one of {tuple(ENCODINGS)}")
+    encoding = ENCODINGS[precision]
+    if kind == "flat":
+        return encoding
+    if kind == "hnsw":
+        return f"HNSW{M}" if precision == "float32" else f"HNSW{M}_{encoding}"
+    # ~4*sqrt(n) lists, but keep >= 39 training points per centroid
+    nlist = nlist or max(1, min(int(4 * math.sqrt(n)), n // 39))
+    if kind == "ivf":
+        return f"IVF{nlist},{encoding}"
+    if kind == "ivfpq":
+        # PQ codes are already compressed, so `precision` does not apply here.
+        # One sub-quantizer per ~8 dimensions; m must divide dim
+        pq_m = pq_m or next(m for m in range(max(1, dim // 8), 0, -1) if dim % m == 0)
+        return f"IVF{nlist},PQ{pq_m}x{pq_bits}"
+    raise ValueError(f"Unknown index kind {kind!r}; expected one of {INDEX_KINDS}")
+
+
+def set_search_params(index, nprobe: int = None, ef_search: int = None, rescore: int = None):
+    """Sets the query-time recall/latency knobs that apply to this index type."""
+    if isinstance(index, RescoringIndex):
+        if rescore is not None:
+            index.rescore_factor = rescore
+        index = index.index
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(index, "hnsw") and ef_search is not None:
+        index.hnsw.efSearch = ef_search
+
+
+def apply_search_knobs(index, knobs: dict):
+    """set_search_params() from a knobs dict, falling back to the defaults (e.g. after loading)."""
+    set_search_params(index, knobs.get("nprobe", NPROBE), knobs.get("ef_search", EF_SEARCH),
+                      knobs.get("rescore", RESCORE_FACTOR))
+
+
+def build_index(vectors, kind: str, metric=faiss.METRIC_L2, nlist: int = None, M: int = HNSW_M,
+                ef_construction: int = EF_CONSTRUCTION, ef_search: int = EF_SEARCH,
+                nprobe: int = NPROBE, pq_m: int = None, pq_bits: int = PQ_BITS,
+                precision: str = "float32"):
+    """
+    A trained and populated FAISS index over a float32 (n, dim) array, and the
+    kind actually built: small corpora fall back to "flat" whatever was asked.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    if kind != "flat" and n < MIN_ANN_VECTORS:
+        print(f"   {n} vectors < {MIN_ANN_VECTORS}: keeping the exact flat index instead of {kind}")
+        kind = "flat"
+
+    index = faiss.index_factory(dim, factory_string(kind, dim, n, nlist, M, pq_m, pq_bits, precision), metric)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efConstruction = ef_construction
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    return index, kind
+
+
+def convert_to_ann(vectorstore, kind: str = FAISS_INDEX, precision: str = FAISS_PRECISION,
+                   rescore: int = RESCORE_FACTOR, **knobs):
+    """
+    Swaps a LangChain FAISS store's flat index for one of `kind` / `precision`,
+    reusing the stored vectors (no re-embedding). Row order is kept, so the
+    docstore mapping stays valid. Lossy indexes are wrapped in a
+    RescoringIndex unless rescore=0.
+    """
+    if kind == "flat" and precision == "float32":
+        return vectorstore
+    index = vectorstore.index
+    print(f"🧭 Building {kind} ({precision}) index over {index.ntotal} vectors...")
+    vectors = index.reconstruct_n(0, index.ntotal)
+    vectorstore.index, built_kind = build_index(vectors, kind, index.metric_type, precision=precision, **knobs)
+    # Test what was built, not what was asked for: an exact fallback needs no rescoring
+    if rescore and is_lossy(built_kind, precision):
+        vectorstore.index = RescoringIndex(vectorstore.index, vectors, rescore)
+    return vectorstore
+
+
+def index_cache_key(key: str, kind: str = FAISS_INDEX, precision: str = FAISS_PRECISION, **knobs) -> str:
+    """Cache key for an index of `kind` / `precision` over the documents identified by `key`."""
+    if kind == "flat" and precision == "float32":
+        return key
+    build_knobs = sorted((name, value) for name, value in knobs.items() if name not in SEARCH_KNOBS)
+    return "-".join([key, kind, precision] + [f"{name}{value}" for name, value in build_knobs])
+
+
+# --- 2. Recall / Latency Benchmark ---
+def recall_at_k(exact_ids, approx_ids) -> float:
+    """Fraction of the exact top-k neighbours that the approximate search also returned."""
+    k = exact_ids.shape[1]
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact_ids, approx_ids))
+    return hits / (len(exact_ids) * k)
+
+
+def benchmark(n_docs=50_000, dim=768, k=10, n_queries=200, seed=0, configs=None):
+    """
+    Builds each index kind over the same clustered random vectors and reports
+    build time, index RAM, per-query latency and recall@k against the flat
+    float32 index (which must be the first config). Configs are
+    (kind, precision, search knobs); lossy ones are rescored at full precision.
+    """
+    rng = np.random.default_rng(seed)
+    # Clustered data behaves more like real embeddings than uniform noise
+    centers = rng.standard_normal((256, dim)).astype(np.float32)
+    docs = centers[rng.integers(0, 256, n_docs)] + 0.5 * rng.standard_normal((n_docs, dim)).astype(np.float32)
+    queries = docs[rng.choice(n_docs, n_queries, replace=False)] + 0.1 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    configs = configs or [
+        ("flat", "float32", {}),
+        ("flat", "float16", {"rescore": 1}),
+        ("flat", "int8", {"rescore": 1}),
+        ("flat", "int8", {"rescore": 4}),
+        ("ivf", "float32", {"nprobe": 4}),
+        ("ivf", "float32", {"nprobe": 16}),
+        ("hnsw", "float32", {"ef_search": 32}),
+        ("hnsw", "float32", {"ef_search": 128}),
+        ("hnsw", "int8", {"ef_search": 128, "rescore": 4}),
+        ("ivfpq", "float32", {"nprobe": 16, "rescore": 1}),
+        ("ivfpq", "float32", {"nprobe": 16, "rescore": 8}),
+    ]
+
+    print(f"{n_queries} queries x {n_docs} docs x {dim} dims, k={k}")
+    exact_ids, flat_latency = None, None
+    built = {}
+    for kind, precision, search_knobs in configs:
+        if (kind, precision) not in built:
+            start = time.perf_counter()
+            raw, built_kind = build_index(docs, kind, precision=precision)
+            megabytes = faiss.serialize_index(raw).nbytes / 2**20
+            print(f"  built {kind} ({precision}) in {time.perf_counter() - start:.1f}s, {megabytes:.1f} MB in RAM")
+            built[(kind, precision)] = RescoringIndex(raw, docs) if is_lossy(built_kind, precision) else raw
+        index = built[(kind, precision)]
+        set_search_params(index, **search_knobs)
+
+        start = time.perf_counter()
+        for q in queries:   # one query at a time, as a RAG app issues them
+            index.search(q[None, :], k)
+        latency = (time.perf_counter() - start) / n_queries
+        _, ids = index.search(queries, k)
+
+        if exact_ids is None:
+            exact_ids, flat_latency = ids, latency
+        label = f"{kind} {precision} {search_knobs}" if search_knobs else f"{kind} {precision}"
+        print(f"  {label:<48} {1000 * latency:7.3f} ms/query "
+              f"({flat_latency / latency:5.1f}x)  recall@{k} = {recall_at_k(exact_ids, ids):.3f}")
+
+
+# --- 3. Demo ---
+if __name__ == "__main__":
+    print("🔹 FAISS ANN Index Benchmark (vs. exact flat search)")
+    benchmark()
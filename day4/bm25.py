@@ -0,0 +1,63 @@
+"""
+Docstring for agentloop.bm25
+
+BM25 Lexical Search
+Exact identifiers such as "Policy P101" or "Procedure T201" are matched far
+more reliably (and cheaply) by a keyword index than by an embedding. BM25Index
+is a small inverted index over the same LangChain Documents that go into FAISS:
+a query only touches the posting lists of its own terms and never calls a model.
+FanOutRetriever(lexical=...) fuses it with the dense results.
+
+Usage:
+    keyword_index = BM25Index(policy_docs)
+    keyword_index.search("What does Policy P101 say?", k=2)   # [(doc, score), ...]
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    """Lower-cased word tokens; identifiers like 'P101' stay whole."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of Documents."""
+
+    def __init__(self, documents, k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        # term -> [(doc index, term frequency), ...]
+        self.postings = {}
+        self.doc_lengths = []
+        for i, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+
+        n = len(self.documents)
+        self.avg_length = sum(self.doc_lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 4):
+        """Returns up to k (doc, score) pairs, best first; docs sharing no term with the query are skipped."""
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[i], score) for i, score in best]
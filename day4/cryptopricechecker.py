@@ -1,5 +1,6 @@
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 from langchain_ollama import ChatOllama
@@ -46,6 +47,8 @@ def get_crypto_price(coin_id: str, currency: str) -> str:
 # Define the list of tools and the map for execution
 tools = [get_crypto_price]
 tools_map: Dict[str, Any] = {tool.name: tool for tool in tools}
+# Tool calls from one AIMessage are independent, so they run side by side
+TOOL_WORKERS = 8
 
 
 # --- 2. Setup LLM and Chain ---
@@ -73,6 +76,29 @@ runnable = prompt | llm_with_tools
 
 # --- 3. Implement the Correct Manual Agent Loop ---
 
+def execute_tool_calls(tool_calls: List[dict], max_workers: int = TOOL_WORKERS) -> List[ToolMessage]:
+    """
+    Runs every requested tool call concurrently and returns one ToolMessage per
+    call, in the same order as `tool_calls`. Five price lookups cost one HTTP
+    round trip of wall time instead of five.
+    """
+    for tool_call in tool_calls:
+        if tool_call["name"] not in tools_map:
+            raise ValueError(f"Unknown tool: {tool_call['name']}")
+
+    def run(tool_call: dict) -> ToolMessage:
+        # The 'args' are often returned as a dictionary; we ensure it's a dict for invocation
+        tool_output_string = tools_map[tool_call["name"]].invoke(tool_call.get("args", {}))
+        # Create a ToolMessage with the result and the linked tool_call_id
+        return ToolMessage(content=tool_output_string, tool_call_id=tool_call["id"])
+
+    if len(tool_calls) == 1:
+        return [run(tool_calls[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tool_calls))) as pool:
+        # map() yields results in submission order, whatever order they finish in
+        return list(pool.map(run, tool_calls))
+
+
 def run_manual_agent(user_input: str) -> str:
     """
     Manually runs the Agent/Tool loop by inspecting the AIMessage's tool_calls attribute.
@@ -97,26 +123,9 @@ def run_manual_agent(user_input: str) -> str:
     print(f"⚙️ LLM requested {len(ai_message.tool_calls)} tool call(s)...")
     messages.append(ai_message) # Add the AI's tool call message to history
     
-    # 2. Execute the tool(s) and prepare results
-    for tool_call in ai_message.tool_calls:
-        tool_name = tool_call["name"]
-        # The 'args' are often returned as a dictionary; we ensure it's a dict for invocation
-        tool_args = tool_call.get("args", {}) 
-        tool_id = tool_call["id"] # Required to link the result back to the tool call
-        
-        if tool_name not in tools_map:
-            raise ValueError(f"Unknown tool: {tool_name}")
-        
-        # Call the actual Python function (the tool)
-        tool_output_string = tools_map[tool_name].invoke(tool_args)
-        
-        # 3. Create a ToolMessage with the result and the linked tool_call_id
-        tool_message = ToolMessage(
-            content=tool_output_string,
-            tool_call_id=tool_id,
-        )
-        messages.append(tool_message) # Add the tool's output to the history
-        
+    # 2. Execute the tool(s) in parallel and 3. add their ToolMessages in call order
+    messages.extend(execute_tool_calls(ai_message.tool_calls))
+
     # 4. Final invocation: LLM uses the tool output to generate the final answer
     print("🔄 Sending tool results back to LLM for final answer...")
     final_ai_message = runnable.invoke({"messages": messages})
@@ -135,7 +144,12 @@ if __name__ == "__main__":
     final_answer_1 = run_manual_agent(api_query)
     print(f"\n**[FINAL AI RESPONSE]:** {final_answer_1}")
 
-    # Query 2: Does NOT require the tool
+    # Query 2: Several independent tool calls, executed concurrently
+    multi_query = "What are the current prices of Bitcoin, Ethereum, Solana, Cardano and Dogecoin in USD?"
+    final_answer_multi = run_manual_agent(multi_query)
+    print(f"\n**[FINAL AI RESPONSE]:** {final_answer_multi}")
+
+    # Query 3: Does NOT require the tool
     direct_query = "What is the primary difference between a cryptocurrency and a fiat currency?"
     final_answer_2 = run_manual_agent(direct_query)
     print(f"\n**[FINAL AI RESPONSE]:** {final_answer_2}")
@@ -151,9 +165,9 @@ If empty: The LLM's text content is returned directly.
 
 If populated (Tool is called):
 
-The loop extracts the tool name, arguments (args), and the unique tool ID.
+execute_tool_calls() extracts each call's tool name, arguments (args), and unique tool ID.
 
-It executes the corresponding function from the tools_map using the extracted arguments.
+It executes the corresponding functions from the tools_map concurrently on a thread pool, so several price lookups overlap instead of running one after another. The ToolMessages keep the original tool_calls order.
 
 Send Result Back: The output from the executed tool (e.g., "The price is $68,000 USD") is wrapped in a ToolMessage (linked by the tool_call_id) and appended to the message history.
 
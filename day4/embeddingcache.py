@@ -0,0 +1,200 @@
+"""
+Docstring for agentloop.embeddingcache
+
+Content-Addressed Embedding Cache
+Embedding the same string twice gives the same vector, so there is no reason to
+ask Ollama again. EmbeddingCache is a small SQLite table keyed by
+(model, sha256(text)) with LRU eviction and hit/miss counters. It is used in two
+ways:
+
+    # 1. Raw ollama.embeddings() calls (day2 get_embedding)
+    vector = cached_embedding("king", model="nomic-embed-text")
+
+    # 2. Any LangChain embeddings object (OllamaEmbeddings for FAISS)
+    ollama_embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:  # the raw ollama helper works without LangChain installed
+    Embeddings = object
+
+# --- 1. Configuration ---
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", ".embedding_cache.sqlite")
+MAX_ENTRIES = 500_000   # least-recently-used vectors are evicted beyond this
+TOUCH_FLUSH_EVERY = 1_000   # buffered last_used updates written per batch
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# --- 2. The SQLite Cache ---
+class EmbeddingCache:
+    """A persistent (model, text hash) -> vector store with LRU eviction."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   model TEXT NOT NULL,
+                   hash TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   last_used INTEGER NOT NULL,
+                   PRIMARY KEY (model, hash))"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        # (model, hash) -> last_used of cache hits not yet written; keeps reads
+        # out of write transactions. Flushed with the next put_many(), every
+        # TOUCH_FLUSH_EVERY hits, and on close().
+        self._touched = {}
+
+    def get_many(self, model: str, texts):
+        """Returns a list of vectors (None where the text is not cached)."""
+        hashes = [text_hash(t) for t in texts]
+        found = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = list(set(hashes[i:i + 500]))
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time_ns()
+                self._touched.update(((model, h), now) for h in found)
+                if len(self._touched) >= TOUCH_FLUSH_EVERY:
+                    self._flush_touched()
+                    self._conn.commit()
+
+            vectors = [array("f", found[h]).tolist() if h in found else None for h in hashes]
+            hit_count = sum(v is not None for v in vectors)
+            self.hits += hit_count
+            self.misses += len(vectors) - hit_count
+        return vectors
+
+    def put_many(self, model: str, texts, vectors):
+        now = time.time_ns()
+        rows = [(model, text_hash(t), array("f", v).tobytes(), now) for t, v in zip(texts, vectors)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._size += self._conn.total_changes - before
+            self._flush_touched()   # before eviction, so recent hits are not evicted
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._conn.commit()
+
+    def get(self, model: str, text: str):
+        return self.get_many(model, [text])[0]
+
+    def put(self, model: str, text: str, vector):
+        self.put_many(model, [text], [vector])
+
+    def _flush_touched(self):
+        """Writes the buffered last_used updates; call with the lock held, then commit."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                [(now, model, h) for (model, h), now in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self, count: int):
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (count,),
+        )
+        self._size -= count
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+_default_cache = None
+
+def get_default_cache() -> EmbeddingCache:
+    """Returns the process-wide cache, opening it on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = EmbeddingCache()
+    return _default_cache
+
+
+# --- 3. Wrappers ---
+def cached_embedding(text, model="nomic-embed-text", cache: EmbeddingCache = None):
+    """ollama.embeddings(model, prompt=text)["embedding"], served from the cache when possible."""
+    cache = cache or get_default_cache()
+    vector = cache.get(model, text)
+    if vector is None:
+        import ollama
+        vector = ollama.embeddings(model=model, prompt=text)["embedding"]
+        cache.put(model, text, vector)
+    return vector
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps a LangChain embeddings object so only uncached texts reach the model."""
+
+    def __init__(self, embeddings, cache: EmbeddingCache = None):
+        self.embeddings = embeddings
+        self.cache = cache or get_default_cache()
+
+    @property
+    def model(self) -> str:
+        # Keeps the model name visible to faisscache's cache key
+        return getattr(self.embeddings, "model", None) or type(self.embeddings).__name__
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = self.cache.get_many(self.model, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            # Embed each distinct missing text once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = self.embeddings.embed_documents(unique_texts)
+            self.cache.put_many(self.model, unique_texts, new_vectors)
+            by_text = dict(zip(unique_texts, new_vectors))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
+
+    def embed_query(self, text):
+        # Some wrappers prefix queries differently from documents, so queries
+        # get their own namespace.
+        namespace = f"{self.model}|query"
+        vector = self.cache.get(namespace, text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(namespace, text, vector)
+        return vector
@@ -0,0 +1,137 @@
+"""
+Docstring for agentloop.faisscache
+
+Persistent FAISS Index Cache
+Every RAG example builds its vector store with FAISS.from_documents(), which
+re-embeds the whole corpus through Ollama on every run. load_or_build_faiss()
+does the same thing once, saves the index and docstore to disk under a key made
+from a hash of the documents plus the embedding model name, and on later runs
+loads them back (memory-mapped) as long as nothing changed.
+
+The index kind (flat by default) comes from FAISS_INDEX or index_kind=, and the
+stored precision from FAISS_PRECISION or precision=; see annindex.py for the
+IVF / HNSW / IVF-PQ options and quantizedindex.py for float16 / int8 storage.
+
+Usage:
+    from faisscache import load_or_build_faiss
+    vectorstore = load_or_build_faiss(docs, ollama_embeddings)
+    vectorstore = load_or_build_faiss(docs, ollama_embeddings, index_kind="hnsw", ef_search=64)
+    vectorstore = load_or_build_faiss(docs, ollama_embeddings, precision="int8", rescore=4)
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import faiss
+from langchain_community.vectorstores import FAISS
+
+from annindex import FAISS_INDEX, FAISS_PRECISION, apply_search_knobs, convert_to_ann, index_cache_key
+from quantizedindex import attach_full_vectors, save_local
+
+# Where cached indexes live (one sub-folder per cache key)
+FAISS_CACHE_DIR = os.environ.get("FAISS_CACHE_DIR", ".faiss_cache")
+
+
+def embedding_model_name(embeddings) -> str:
+    """Best-effort name of the embedding model, used as part of the cache key."""
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+def documents_cache_key(docs, embeddings) -> str:
+    """Content hash of the documents (text + metadata) and the embedding model."""
+    h = hashlib.sha256()
+    h.update(embedding_model_name(embeddings).encode("utf-8"))
+    for doc in docs:
+        h.update(b"\x00")
+        h.update(doc.page_content.encode("utf-8"))
+        h.update(b"\x01")
+        h.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def file_cache_key(file_path: str, embeddings) -> str:
+    """Like documents_cache_key(), but hashes a source file without loading it."""
+    h = hashlib.sha256()
+    h.update(embedding_model_name(embeddings).encode("utf-8"))
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:32]
+
+
+def load_or_build_faiss(docs, embeddings, cache_dir: str = FAISS_CACHE_DIR,
+                        mmap: bool = True, build=None, index_kind: str = FAISS_INDEX,
+                        precision: str = FAISS_PRECISION, **index_knobs) -> FAISS:
+    """
+    Returns a FAISS vector store for `docs`, reusing the on-disk copy if the
+    documents and embedding model are unchanged.
+
+    mmap=True memory-maps the saved index instead of reading it into RAM; pass
+    mmap=False if you intend to add or delete vectors afterwards. `build` lets a
+    caller swap in its own builder (defaults to FAISS.from_documents).
+    index_kind / precision / index_knobs select an ANN or quantized index
+    (see annindex.py).
+    """
+    key = index_cache_key(documents_cache_key(docs, embeddings), index_kind, precision, **index_knobs)
+    path = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(path, "index.pkl")):
+        print(f"📦 Loading cached FAISS index ({key[:12]}...)")
+        io_flags = faiss.IO_FLAG_MMAP if mmap else 0
+        # The pickle was written by save_local() below, so it is trusted.
+        vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True,
+                                       io_flags=io_flags)
+        attach_full_vectors(vectorstore, path)
+        # nprobe is not saved with IVF indexes, so re-apply the search knobs
+        apply_search_knobs(vectorstore.index, index_knobs)
+        return vectorstore
+
+    print(f"🧮 No cached index for these documents, embedding {len(docs)} chunks...")
+    vectorstore = (build or FAISS.from_documents)(docs, embeddings)
+    vectorstore = convert_to_ann(vectorstore, index_kind, precision, **index_knobs)
+    # Save next to the final folder and rename, so a crash mid-save never
+    # leaves a half-written index behind under a valid key.
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    save_local(vectorstore, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process cached the same key first; keep theirs.
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    # Serve full-precision rescoring vectors from disk rather than RAM
+    return attach_full_vectors(vectorstore, path)
+
+
+def save_faiss_atomic(vectorstore: FAISS, path: str, sidecar_name: str = None, sidecar: dict = None):
+    """
+    Saves a vector store (plus an optional JSON sidecar such as a checkpoint
+    or manifest) to `path`, swapping the folder in so readers never see a
+    half-written index next to a mismatched sidecar.
+    """
+    tmp_path, old_path = f"{path}.tmp", f"{path}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    save_local(vectorstore, tmp_path)
+    if sidecar_name:
+        with open(os.path.join(tmp_path, sidecar_name), "w") as f:
+            json.dump(sidecar, f)
+
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    attach_full_vectors(vectorstore, path)
+
+
+def load_faiss_saved(path: str, embeddings, sidecar_name: str):
+    """Counterpart of save_faiss_atomic(): returns (vectorstore, sidecar) or (None, None)."""
+    # `.old` only survives if we crashed halfway through swapping folders
+    for candidate in (path, f"{path}.old"):
+        sidecar_file = os.path.join(candidate, sidecar_name)
+        if os.path.exists(sidecar_file):
+            with open(sidecar_file) as f:
+                sidecar = json.load(f)
+            # Written by save_faiss_atomic() above, so the pickle is trusted.
+            vectorstore = FAISS.load_local(candidate, embeddings, allow_dangerous_deserialization=True)
+            return attach_full_vectors(vectorstore, candidate), sidecar
+    return None, None
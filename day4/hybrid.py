@@ -3,15 +3,22 @@ Docstring for agentloop.hybrid
 
 Hybrid RAG (Basic Multiple Retrievers)
 In advanced RAG, you might combine different types of retrieval. This example shows a simple hybrid approach where the LLM is given context from two separate sources (two different vector stores) before generating the answer.
+Each source is searched both semantically (FAISS) and lexically (BM25), and the two rankings are fused.
 """
 
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
+from faisscache import documents_cache_key, load_or_build_faiss
+from embeddingcache import CachedEmbeddings
+from hybridretrieval import FanOutRetriever
+from bm25 import BM25Index
+from retrieverregistry import RetrieverRegistry
+from semanticcache import SemanticCache
+from llmcache import cache_deterministic
 
 # --- A. Two Separate Data Sources ---
 # Source 1: Company Policy Documents
@@ -26,29 +33,39 @@ procedure_docs = [
 ]
 
 # --- B. Embeddings and Two Vector Stores ---
-ollama_embeddings = OllamaEmbeddings(model="nomic-embed-text")
+ollama_embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
 
-# Create two independent vector stores
-policy_vectorstore = FAISS.from_documents(policy_docs, ollama_embeddings)
-procedure_vectorstore = FAISS.from_documents(procedure_docs, ollama_embeddings)
+# Create two independent vector stores (each cached on disk by content hash)
+policy_vectorstore = load_or_build_faiss(policy_docs, ollama_embeddings)
+procedure_vectorstore = load_or_build_faiss(procedure_docs, ollama_embeddings)
 
 # --- C. The Hybrid Context Aggregator ---
+# Retrievers are configured (and their search kwargs validated) once at startup,
+# not rebuilt on every question. Retrieve the 1 most relevant document from each.
+retrievers = RetrieverRegistry()
+retrievers.register("HR Policy", policy_vectorstore, k=1)
+retrievers.register("IT Procedure", procedure_vectorstore, k=1)
+
+# Each source also gets a BM25 keyword index over the same documents, so exact
+# identifiers like "Policy P101" are found without relying on the embedding.
+keyword_indexes = {
+    "HR Policy": BM25Index(policy_docs),
+    "IT Procedure": BM25Index(procedure_docs),
+}
+
+# The question is embedded once and all registered stores are searched concurrently
+# with the keyword indexes; per source, dense and keyword hits are merged by RRF.
+# Adding a source is one more registration; latency stays that of the slowest store.
+hybrid_retriever = FanOutRetriever(retrievers, ollama_embeddings, lexical=keyword_indexes)
+
 def aggregate_context(question):
-    """Retrieves relevant context from both vector stores."""
-    # Retrieve 1 most relevant document from HR policies
-    policy_context = policy_vectorstore.as_retriever(k=1).invoke(question)
-    # Retrieve 1 most relevant document from IT procedures
-    procedure_context = procedure_vectorstore.as_retriever(k=1).invoke(question)
-    
-    # Combine the content from both sources into one large context string
-    combined_content = (
-        "--- HR Policy Context ---\n" + "\n".join([d.page_content for d in policy_context]) +
-        "\n\n--- IT Procedure Context ---\n" + "\n.join([d.page_content for d in procedure_context])" # FIX: Use correct join
-    )
-    # Correction for join on the second part:
-    combined_content = (
-        "--- HR Policy Context ---\n" + "\n".join([d.page_content for d in policy_context]) +
-        "\n\n--- IT Procedure Context ---\n" + "\n".join([d.page_content for d in procedure_context])
+    """Retrieves relevant context from every vector store in parallel."""
+    per_source = hybrid_retriever.search(question)
+
+    # Combine the content from all sources into one large context string
+    combined_content = "\n\n".join(
+        f"--- {name} Context ---\n" + "\n".join([doc.page_content for doc, _ in results])
+        for name, results in per_source.items()
     )
 
     return combined_content
@@ -67,15 +84,18 @@ Question: {question}"""
 
 rag_prompt = ChatPromptTemplate.from_template(RAG_TEMPLATE) # This resolves the NameError
 
-ollama_llm = ChatOllama(model="llama3", temperature=0)
+ollama_llm = cache_deterministic(ChatOllama(model="llama3", temperature=0))
+
+# Near-duplicate questions that retrieve the same context reuse the stored answer;
+# answers are dropped when either source's documents change.
+response_cache = SemanticCache(ollama_embeddings, namespace="hybrid",
+                               index_version=documents_cache_key(policy_docs + procedure_docs, ollama_embeddings))
 
 # The input runs through the custom aggregator (RunnableLambda) first
 hybrid_chain = (
     # This structure maps the original question to both the 'context' and 'question' keys
     {"context": RunnableLambda(aggregate_context), "question": RunnablePassthrough()}
-    | rag_prompt # This now correctly references the defined prompt
-    | ollama_llm
-    | StrOutputParser()
+    | response_cache.wrap(rag_prompt | ollama_llm | StrOutputParser()) # rag_prompt is now correctly defined
 )
 
 user_query = "If I need to reboot the server, how long will it take, and how far in advance do I need to ask for a vacation?"
@@ -88,4 +108,8 @@ print("-" * 40)
 final_answer = hybrid_chain.invoke(user_query)
 
 print(f"\n✅ LLM (Ollama) Answer:")
-print(final_answer)
\ No newline at end of file
+print(final_answer)
+
+print(f"\n⏱️ Retriever latency:")
+for name, latency in retrievers.stats().items():
+    print(f"   {name}: {latency}")
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Docstring for agentloop.hybridretrieval
+
+Parallel Multi-Retriever Fan-Out
+Querying several vector stores one after another costs one embedding call and
+one search per store, in series. FanOutRetriever embeds the question once,
+searches every store concurrently with that same vector, and can merge the
+per-store results into one ranking with reciprocal-rank fusion (RRF) or
+min-max score normalization.
+
+Sources are either a plain {name: vectorstore} dict or a RetrieverRegistry, in
+which case each store is searched with its registered settings and the search
+time is recorded in the registry's latency metrics. Keyword indexes passed as
+`lexical` (see bm25.py) are searched alongside; a source with both a dense
+store and a keyword index returns the fusion of the two. The keyword list is
+weighted LEXICAL_WEIGHT and wins ties, so an exact identifier match ("Policy
+P102") is not outvoted by an embedding that ranks a near-duplicate first.
+
+Usage:
+    retriever = FanOutRetriever({"HR Policy": policy_vectorstore,
+                                 "IT Procedure": procedure_vectorstore}, ollama_embeddings, k=1)
+    per_source = retriever.search(question)     # {"HR Policy": [(doc, score)], ...}
+    merged = retriever.fused(question, k=3)     # [Document, ...] best first
+
+    hybrid = FanOutRetriever(registry, ollama_embeddings,
+                             lexical={"HR Policy": BM25Index(policy_docs)})
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from retrieverregistry import RetrieverRegistry
+
+RRF_K = 60            # standard RRF damping constant
+FUSION_CANDIDATES = 10   # results fetched per list before dense + lexical fusion
+LEXICAL_WEIGHT = 1.5     # BM25 list weight vs. 1.0 for the dense list
+
+
+def doc_key(doc):
+    """
+    Identity of a document across result lists. Docstore ids are per-store
+    UUIDs, so the same text indexed in two stores is matched on content.
+    """
+    return (doc.page_content, repr(sorted(doc.metadata.items())))
+
+
+# --- 1. Fusion Strategies ---
+def reciprocal_rank_fusion(result_lists, k: int = RRF_K, weights=None):
+    """
+    Merges ranked lists of (doc, score) by RRF: each doc scores
+    sum(weight / (k + rank)). Only ranks are used, so lists with incomparable
+    scores can be fused. Ties keep the order of first appearance, so earlier
+    lists win them.
+    """
+    fused, docs = {}, {}
+    for results, weight in zip(result_lists, weights or [1.0] * len(result_lists)):
+        for rank, (doc, _) in enumerate(results, start=1):
+            key = doc_key(doc)
+            docs[key] = doc
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    ranked = sorted(fused, key=fused.get, reverse=True)
+    return [(docs[key], fused[key]) for key in ranked]
+
+
+def normalized_score_fusion(result_lists, weights=None):
+    """
+    Merges lists of (doc, relevance) where higher is better: each list is
+    min-max scaled to [0, 1] and a doc's weighted scores are summed across lists.
+    """
+    fused, docs = {}, {}
+    for results, weight in zip(result_lists, weights or [1.0] * len(result_lists)):
+        if not results:
+            continue
+        scores = [score for _, score in results]
+        low, high = min(scores), max(scores)
+        for doc, score in results:
+            key = doc_key(doc)
+            docs[key] = doc
+            scaled = (score - low) / (high - low) if high > low else 1.0
+            fused[key] = fused.get(key, 0.0) + weight * scaled
+    ranked = sorted(fused, key=fused.get, reverse=True)
+    return [(docs[key], fused[key]) for key in ranked]
+
+
+# --- 2. The Fan-Out Retriever ---
+class FanOutRetriever:
+    """Embeds a question once and searches several vector stores in parallel."""
+
+    def __init__(self, sources, embeddings, k: int = 4, fusion: str = "rrf",
+                 max_workers: int = None, lexical: dict = None):
+        if fusion not in ("rrf", "minmax"):
+            raise ValueError(f"Unknown fusion strategy: {fusion}")
+        if not isinstance(sources, RetrieverRegistry):
+            registry = RetrieverRegistry()
+            for name, store in sources.items():
+                registry.register(name, store, k=k)
+            sources = registry
+        self.registry = sources
+        self.lexical = dict(lexical or {})
+        self.embeddings = embeddings
+        self.k = k
+        self.fusion = fusion
+        # Long-lived pool: FAISS releases the GIL while searching, so threads run in parallel
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or len(self.registry) + len(self.lexical))
+
+    def search(self, question: str, k: int = None) -> dict:
+        """
+        Returns {source name: [(doc, score), ...]}, best first. Dense-only
+        sources return relevance (higher = better) and their registered k
+        unless `k` overrides it; sources with a keyword index return the
+        fused dense + lexical ranking.
+        """
+        # Keyword searches need no embedding, so start them first
+        lexical = {
+            name: self._pool.submit(index.search, question, max(k or self.k, FUSION_CANDIDATES))
+            for name, index in self.lexical.items()
+        }
+        dense = {}
+        if len(self.registry):
+            vector = self.embeddings.embed_query(question)   # the only embedding call
+            for entry in self.registry:
+                depth = max(k or entry.k, FUSION_CANDIDATES) if entry.name in lexical else k
+                dense[entry.name] = self._pool.submit(entry.search_by_vector, vector, depth)
+
+        results = {}
+        for name in dict.fromkeys([*dense, *lexical]):
+            if name in dense and name in lexical:
+                limit = k or self.registry[name].k
+                # Keyword list first and weighted up: exact-term matches win ties
+                results[name] = self._merge([lexical[name].result(), dense[name].result()],
+                                            weights=[LEXICAL_WEIGHT, 1.0])[:limit]
+            elif name in dense:
+                results[name] = dense[name].result()
+            else:
+                results[name] = lexical[name].result()[:k or self.k]
+        return results
+
+    def fused(self, question: str, k: int = None):
+        """All sources merged into one ranked list of Documents."""
+        merged = self._merge(self.search(question, k).values())
+        return [doc for doc, _ in merged[:k or self.k]]
+
+    def _merge(self, result_lists, weights=None):
+        result_lists = list(result_lists)
+        if self.fusion == "rrf":
+            return reciprocal_rank_fusion(result_lists, weights=weights)
+        return normalized_score_fusion(result_lists, weights=weights)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,148 @@
+"""
+Docstring for agentloop.incrementalindex
+
+Incremental Index Updates (Upsert / Delete)
+Rebuilding a FAISS store from scratch re-embeds every record, even if only a
+handful changed. IncrementalIndex keeps a manifest next to the index that maps a
+stable document id (e.g. the Patient ID of a medical record) to a hash of that
+document's content and the ids of its chunks. On upsert only documents whose
+hash changed are re-split, re-embedded and swapped in; everything else is left
+untouched.
+
+Usage:
+    index = IncrementalIndex.load_or_create(".faiss_cache/records", ollama_embeddings,
+                                            get_id=patient_id, text_splitter=text_splitter)
+    index.sync(documents)      # upsert changed records, delete vanished ones
+    index.save()
+    retriever = index.vectorstore.as_retriever()
+"""
+import hashlib
+import re
+
+from langchain_community.vectorstores import FAISS
+
+from faisscache import load_faiss_saved, save_faiss_atomic
+
+MANIFEST_FILE = "manifest.json"
+
+
+def metadata_id(key: str):
+    """get_id function reading a metadata field, e.g. metadata_id("source")."""
+    return lambda doc: str(doc.metadata[key])
+
+
+def patient_id(doc) -> str:
+    """get_id function for medical records: the 'Patient ID: P1001' field."""
+    match = re.search(r"Patient ID:\s*(\w+)", doc.page_content)
+    if not match:
+        raise ValueError(f"No Patient ID in record: {doc.page_content[:60]!r}")
+    return match.group(1)
+
+
+class IncrementalIndex:
+    """A FAISS store whose contents can be upserted and deleted by document id."""
+
+    def __init__(self, embeddings, get_id, text_splitter=None, path: str = None,
+                 vectorstore: FAISS = None, manifest: dict = None):
+        self.embeddings = embeddings
+        self.get_id = get_id
+        self.text_splitter = text_splitter
+        self.path = path
+        self.vectorstore = vectorstore
+        # doc_id -> {"hash": content hash, "chunks": [chunk ids in the docstore]}
+        self.manifest = manifest or {}
+
+    @classmethod
+    def load_or_create(cls, path: str, embeddings, get_id, text_splitter=None):
+        vectorstore, manifest = load_faiss_saved(path, embeddings, MANIFEST_FILE)
+        if vectorstore is not None:
+            print(f"📦 Loaded index with {len(manifest)} documents from {path}")
+        return cls(embeddings, get_id, text_splitter, path, vectorstore, manifest)
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if self.vectorstore is not None:
+            save_faiss_atomic(self.vectorstore, path, MANIFEST_FILE, self.manifest)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a document is added, updated or deleted (e.g. to invalidate caches)."""
+        h = hashlib.sha256()
+        for doc_id in sorted(self.manifest):
+            h.update(f"{doc_id}\x00{self.manifest[doc_id]['hash']}\x01".encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    # --- Updates ---
+    def upsert(self, documents) -> dict:
+        """
+        Adds or replaces documents by id. Several documents may share an id
+        (e.g. multiple visits of one patient); they are treated as one unit.
+        Returns counts of added / updated / unchanged ids.
+        """
+        groups = self._group(documents)
+        stats = {"added": 0, "updated": 0, "unchanged": 0}
+
+        changed = {}
+        for doc_id, docs in groups.items():
+            digest = self._hash(docs)
+            entry = self.manifest.get(doc_id)
+            if entry and entry["hash"] == digest:
+                stats["unchanged"] += 1
+                continue
+            stats["updated" if entry else "added"] += 1
+            changed[doc_id] = (digest, docs)
+
+        if not changed:
+            return stats
+
+        self.delete([doc_id for doc_id in changed if doc_id in self.manifest])
+
+        chunks, chunk_ids = [], []
+        for doc_id, (digest, docs) in changed.items():
+            doc_chunks = self.text_splitter.split_documents(docs) if self.text_splitter else docs
+            ids = [f"{doc_id}:{n}" for n in range(len(doc_chunks))]
+            self.manifest[doc_id] = {"hash": digest, "chunks": ids}
+            chunks.extend(doc_chunks)
+            chunk_ids.extend(ids)
+
+        print(f"🧮 Re-embedding {len(chunks)} chunks for {len(changed)} changed documents...")
+        if self.vectorstore is None:
+            self.vectorstore = FAISS.from_documents(chunks, self.embeddings, ids=chunk_ids)
+        else:
+            self.vectorstore.add_documents(chunks, ids=chunk_ids)
+        return stats
+
+    def delete(self, doc_ids) -> int:
+        """Removes every chunk of the given document ids; returns how many ids were known."""
+        known = [doc_id for doc_id in doc_ids if doc_id in self.manifest]
+        chunk_ids = [c for doc_id in known for c in self.manifest.pop(doc_id)["chunks"]]
+        if chunk_ids:
+            # One call, so the flat index is compacted once rather than per chunk
+            self.vectorstore.delete(chunk_ids)
+        return len(known)
+
+    def sync(self, documents) -> dict:
+        """Makes the index match `documents` exactly: upserts them and deletes ids no longer present."""
+        documents = list(documents)
+        stats = self.upsert(documents)
+        present = {self.get_id(doc) for doc in documents}
+        stats["deleted"] = self.delete([doc_id for doc_id in list(self.manifest) if doc_id not in present])
+        print(f"   Sync: {stats}")
+        return stats
+
+    # --- Helpers ---
+    def _group(self, documents) -> dict:
+        groups = {}
+        for doc in documents:
+            groups.setdefault(self.get_id(doc), []).append(doc)
+        return groups
+
+    @staticmethod
+    def _hash(docs) -> str:
+        h = hashlib.sha256()
+        for doc in docs:
+            h.update(doc.page_content.encode("utf-8"))
+            h.update(b"\x00")
+            h.update(repr(sorted(doc.metadata.items())).encode("utf-8"))
+            h.update(b"\x01")
+        return h.hexdigest()
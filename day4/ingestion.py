@@ -0,0 +1,166 @@
+"""
+Docstring for agentloop.ingestion
+
+Batched Embedding Ingestion
+FAISS.from_documents() hands every chunk to the embeddings object in one go,
+and the Ollama wrapper then embeds them one request at a time. For large CSV
+exports that is the bottleneck. This module splits the chunks into batches of
+`batch_size`, keeps up to `max_workers` batches in flight against the Ollama
+server at once, reports progress as chunks/sec, and builds the FAISS index from
+the finished vectors.
+
+For exports too large to hold in RAM, index_documents_stream() runs
+load -> split -> embed -> add-to-index over a lazy document iterator, a bounded
+number of rows at a time, and checkpoints the index plus the number of rows
+consumed so an interrupted run resumes where it stopped. Checkpoints hold a
+flat index (it has to accept more vectors); the finished index is converted to
+`index_kind` / `precision` (see annindex.py) before the final save.
+
+Usage:
+    from ingestion import build_faiss_batched, index_documents_stream
+    vectorstore = build_faiss_batched(docs, ollama_embeddings, batch_size=64, max_workers=4)
+    vectorstore = index_documents_stream(loader.lazy_load(), text_splitter, ollama_embeddings,
+                                         index_path=".faiss_cache/medical")
+"""
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from langchain_community.vectorstores import FAISS
+
+from annindex import FAISS_INDEX, FAISS_PRECISION, apply_search_knobs, convert_to_ann
+from faisscache import load_faiss_saved, save_faiss_atomic
+
+# --- 1. Configuration ---
+BATCH_SIZE = 64          # chunks per embedding request batch
+MAX_WORKERS = 4          # batches in flight at once (match OLLAMA_NUM_PARALLEL)
+REPORT_EVERY = 5.0       # seconds between progress lines
+ROWS_PER_STEP = 512      # source rows held in memory at once when streaming
+CHECKPOINT_EVERY = 20    # streaming steps between on-disk checkpoints
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+# --- 2. Progress Reporting ---
+class Throughput:
+    """Counts processed chunks and prints chunks/sec at most every `report_every` seconds."""
+
+    def __init__(self, total: int = None, label: str = "Embedded", report_every: float = REPORT_EVERY):
+        self.total = total
+        self.label = label
+        self.report_every = report_every
+        self.done = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def update(self, count: int):
+        self.done += count
+        now = time.perf_counter()
+        if now - self._last_report >= self.report_every:
+            self._last_report = now
+            self.report()
+
+    def report(self):
+        of_total = f"/{self.total}" if self.total is not None else ""
+        print(f"   {self.label} {self.done}{of_total} chunks ({self.rate:.1f} chunks/sec)")
+
+
+# --- 3. Batched, Parallel Embedding ---
+def embed_in_batches(texts, embeddings, batch_size: int = BATCH_SIZE,
+                     max_workers: int = MAX_WORKERS, progress: Throughput = None):
+    """Embeds `texts` in parallel batches and returns the vectors in input order."""
+    texts = list(texts)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = [None] * len(batches)
+    progress = progress or Throughput(total=len(texts))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(embeddings.embed_documents, batch): i for i, batch in enumerate(batches)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            results[i] = fut.result()
+            progress.update(len(batches[i]))
+
+    return [vector for batch in results for vector in batch]
+
+
+def build_faiss_batched(docs, embeddings, batch_size: int = BATCH_SIZE,
+                        max_workers: int = MAX_WORKERS) -> FAISS:
+    """Drop-in for FAISS.from_documents(docs, embeddings) using batched, parallel embedding."""
+    texts = [d.page_content for d in docs]
+    print(f"Embedding {len(texts)} chunks in batches of {batch_size} ({max_workers} in flight)...")
+    progress = Throughput(total=len(texts))
+    vectors = embed_in_batches(texts, embeddings, batch_size, max_workers, progress)
+    progress.report()
+
+    ids = [d.id for d in docs] if all(getattr(d, "id", None) for d in docs) else None
+    return FAISS.from_embeddings(
+        list(zip(texts, vectors)),
+        embeddings,
+        metadatas=[d.metadata for d in docs],
+        ids=ids,
+    )
+
+
+# --- 4. Streaming Ingestion with Checkpoints ---
+def index_documents_stream(documents, text_splitter, embeddings, index_path: str,
+                           rows_per_step: int = ROWS_PER_STEP, batch_size: int = BATCH_SIZE,
+                           max_workers: int = MAX_WORKERS,
+                           checkpoint_every: int = CHECKPOINT_EVERY,
+                           index_kind: str = FAISS_INDEX, precision: str = FAISS_PRECISION,
+                           **index_knobs) -> FAISS:
+    """
+    Incrementally indexes a (lazy) iterable of source Documents, e.g.
+    CSVLoader(...).lazy_load().
+
+    Only `rows_per_step` source rows and their chunks are held in memory at a
+    time. Every `checkpoint_every` steps the index is saved to `index_path`
+    together with the number of rows consumed; if a checkpoint exists on the
+    next run those rows are skipped, and a finished index is simply loaded.
+    Give each index kind / precision its own index_path (see annindex.index_cache_key).
+    """
+    vectorstore, checkpoint = load_faiss_saved(index_path, embeddings, CHECKPOINT_FILE)
+    if checkpoint and checkpoint.get("complete"):
+        print(f"📦 Loaded finished index from {index_path} ({checkpoint['rows']} rows)")
+        apply_search_knobs(vectorstore.index, index_knobs)
+        return vectorstore
+
+    rows_done = checkpoint["rows"] if checkpoint else 0
+    if rows_done:
+        print(f"↩️  Resuming from checkpoint at row {rows_done}")
+    rows = itertools.islice(iter(documents), rows_done, None)
+
+    progress = Throughput(label="Indexed")
+    steps = 0
+    while True:
+        step_rows = list(itertools.islice(rows, rows_per_step))
+        if not step_rows:
+            break
+
+        chunks = text_splitter.split_documents(step_rows)
+        texts = [c.page_content for c in chunks]
+        vectors = embed_in_batches(texts, embeddings, batch_size, max_workers, progress)
+        metadatas = [c.metadata for c in chunks]
+        if texts and vectorstore is None:
+            vectorstore = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas)
+        elif texts:
+            vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+
+        rows_done += len(step_rows)
+        steps += 1
+        if steps % checkpoint_every == 0 and vectorstore is not None:
+            save_faiss_atomic(vectorstore, index_path, CHECKPOINT_FILE,
+                              {"rows": rows_done, "vectors": vectorstore.index.ntotal, "complete": False})
+            print(f"   💾 Checkpoint saved at row {rows_done}")
+
+    if vectorstore is None:
+        raise ValueError("No documents to index.")
+    vectorstore = convert_to_ann(vectorstore, index_kind, precision, **index_knobs)
+    save_faiss_atomic(vectorstore, index_path, CHECKPOINT_FILE,
+                      {"rows": rows_done, "vectors": vectorstore.index.ntotal, "complete": True})
+    progress.report()
+    return vectorstore
@@ -0,0 +1,183 @@
+"""
+Docstring for agentloop.llmcache
+
+Exact-Match LLM Response Cache (temperature=0)
+A call with temperature=0 returns the same answer for the same model, messages
+and options, so running it again is wasted model time (e.g. re-classifying a
+batch of reviews that was already classified yesterday). LLMCache is a small
+SQLite table keyed by a hash of (model, full message list, options). It only
+caches deterministic calls, and it is used in two ways:
+
+    # 1. Raw ollama.chat() calls (day2 send_completion / classify_review)
+    response = cached_chat(model="llama3", messages=messages, options={"temperature": 0})
+
+    # 2. LangChain chat models (ChatOllama(..., temperature=0) chains)
+    ollama_llm = cache_deterministic(ChatOllama(model="llama3", temperature=0))
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from langchain_core.caches import BaseCache
+    from langchain_core.messages import message_to_dict, messages_from_dict
+    from langchain_core.outputs import ChatGeneration, Generation
+except ImportError:  # the raw ollama helper works without LangChain installed
+    BaseCache = object
+
+# --- 1. Configuration ---
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", ".llm_cache.sqlite")
+# Model settings that change the output of a LangChain chat model
+LLM_PARAMS = ("model", "temperature", "top_k", "top_p", "seed", "num_predict", "num_ctx",
+              "repeat_penalty", "stop", "format", "mirostat")
+
+
+def request_key(model: str, messages, options: dict = None, format=None) -> str:
+    payload = json.dumps({"model": model, "messages": messages, "options": options or {}, "format": format},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(options: dict = None) -> bool:
+    """Only temperature=0 calls are guaranteed to repeat; anything else is never cached."""
+    return (options or {}).get("temperature") == 0
+
+
+# --- 2. The SQLite Cache ---
+class LLMCache:
+    """A persistent request hash -> response text store with hit/miss counters."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   namespace TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   created REAL NOT NULL)"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_namespace ON responses(namespace)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str, namespace: str = ""):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                               (key, namespace, value, time.time()))
+            self._conn.commit()
+
+    def clear(self, namespace: str = None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": size}
+
+    def close(self):
+        self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> LLMCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache()
+        return _default_cache
+
+
+# --- 3. Raw ollama.chat() Helper ---
+def cached_chat(model: str, messages, options: dict = None, format=None, cache: LLMCache = None):
+    """
+    Drop-in for ollama.chat(model=..., messages=..., options=..., format=...). Deterministic
+    calls are answered from the cache when possible; a cached response carries
+    the same ["message"]["content"] shape plus "cached": True.
+    """
+    import ollama
+
+    if not is_deterministic(options):
+        return ollama.chat(model=model, messages=messages, options=options, format=format)
+
+    cache = cache or get_default_cache()
+    key = request_key(model, messages, options, format)
+    cached = cache.get(key)
+    if cached is not None:
+        return {"model": model, "message": json.loads(cached), "done": True, "cached": True}
+
+    response = ollama.chat(model=model, messages=messages, options=options, format=format)
+    message = {"role": response["message"]["role"], "content": response["message"]["content"]}
+    cache.put(key, json.dumps(message), namespace=model)
+    return response
+
+
+# --- 4. LangChain Integration ---
+def llm_params(llm) -> str:
+    """The output-relevant settings of a chat model, as a stable string."""
+    return json.dumps({name: getattr(llm, name, None) for name in LLM_PARAMS}, sort_keys=True, default=str)
+
+
+class LangChainLLMCache(BaseCache):
+    """
+    LangChain BaseCache over LLMCache for one chat model. `namespace` holds the
+    model's settings, since some integrations leave the model name and
+    temperature out of the llm_string LangChain passes in.
+    """
+
+    def __init__(self, cache: LLMCache = None, namespace: str = ""):
+        self.cache = cache or get_default_cache()
+        self.namespace = namespace
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        cached = self.cache.get(self._key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [
+            ChatGeneration(message=messages_from_dict([g["message"]])[0]) if "message" in g
+            else Generation(text=g["text"])
+            for g in json.loads(cached)
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        value = json.dumps([
+            {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+            for g in return_val
+        ])
+        self.cache.put(self._key(prompt, llm_string), value, namespace=self.namespace)
+
+    def clear(self, **kwargs):
+        self.cache.clear(self.namespace)
+
+
+def cache_deterministic(llm, cache: LLMCache = None):
+    """Attaches the persistent cache to a chat model if it runs at temperature=0; returns the model."""
+    if getattr(llm, "temperature", None) == 0:
+        llm.cache = LangChainLLMCache(cache, namespace=llm_params(llm))
+    return llm
@@ -1,12 +1,17 @@
 import os
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from faisscache import FAISS_CACHE_DIR
+from incrementalindex import IncrementalIndex, patient_id
+from recordindex import RecordIndex, RecordRouter
+from semanticcache import SemanticCache
+from embeddingcache import CachedEmbeddings
+from llmcache import cache_deterministic
 
 # --- A. Synthetic Medical Records ---
 # In a real application, you would load these from files (PDF, JSON, EHR export).
@@ -47,22 +52,37 @@ documents = [Document(page_content=record) for record in medical_records]
 
 # --- B. Chunking and Embedding ---
 # 1. Split documents into smaller, semantically coherent chunks (Crucial for RAG)
+# The IncrementalIndex below splits each patient's records when they are (re-)indexed.
 text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-docs = text_splitter.split_documents(documents)
 
 # 2. Initialize Ollama Embeddings (Uses nomic-embed-text or the model you pulled)
+# Wrapped in a local cache so unchanged chunks and repeated queries are never re-embedded.
 print("Initializing Ollama Embeddings...")
-ollama_embeddings = OllamaEmbeddings(model="nomic-embed-text")
+ollama_embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
 
 # 3. Create FAISS Vector Store
 # FAISS is an efficient, in-memory index for fast similarity search.
+# The index is kept on disk and updated per Patient ID: only patients whose
+# records changed are re-embedded, and removed patients are deleted.
 print("Creating FAISS index (Embedding documents)...")
-vectorstore = FAISS.from_documents(docs, ollama_embeddings)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 2}) # Retrieve top 2 relevant documents
+record_index = IncrementalIndex.load_or_create(
+    os.path.join(FAISS_CACHE_DIR, "medical_records"), ollama_embeddings,
+    get_id=patient_id, text_splitter=text_splitter
+)
+record_index.sync(documents)
+record_index.save()
+vectorstore = record_index.vectorstore
+vector_retriever = vectorstore.as_retriever(search_kwargs={"k": 2}) # Retrieve top 2 relevant documents
+
+# 4. Secondary index on exact keys (Patient ID, Date of Visit, ICD-10 code)
+# Questions naming such a key are answered from this index without any embedding call;
+# everything else falls back to the vector search above.
+key_index = RecordIndex(documents)
+retriever = RecordRouter(key_index, vector_retriever).as_runnable()
 
 # --- C. RAG Chain Definition ---
 # 1. Initialize Ollama LLM
-ollama_llm = ChatOllama(model="llama3", temperature=0)
+ollama_llm = cache_deterministic(ChatOllama(model="llama3", temperature=0))
 
 # 2. Define the RAG Prompt Template
 # The template instructs the LLM to use the provided context and remain factual.
@@ -78,13 +98,17 @@ QUESTION: {question}
 """
 rag_prompt = ChatPromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
 
-# 3. Construct the RAG Chain using LCEL
+# 3. Semantic response cache: a near-duplicate question that retrieves exactly the
+# same records gets the stored answer instead of a new generation. Answers are
+# dropped when the indexed records change (IncrementalIndex.version).
+response_cache = SemanticCache(ollama_embeddings, namespace="medicalrecords1",
+                               index_version=lambda: record_index.version)
+
+# 4. Construct the RAG Chain using LCEL
 rag_chain = (
     # Pass the question to the retriever, and the result (context) to the prompt template
     {"context": retriever, "question": RunnablePassthrough()}
-    | rag_prompt
-    | ollama_llm
-    | StrOutputParser()
+    | response_cache.wrap(rag_prompt | ollama_llm | StrOutputParser())
 )
 
 # --- D. Query the RAG System ---
@@ -95,8 +119,9 @@ print(f"User Query: {user_query}")
 print("-" * 30)
 
 # Execute the RAG chain:
-# 1. Question is embedded.
-# 2. FAISS finds the most similar documents (records P1001's diabetes and joint pain).
+# 1. The router spots the exact key "P1001" in the question.
+# 2. The secondary index returns P1001's records (diabetes and joint pain) directly;
+#    questions without a known key are embedded and searched in FAISS instead.
 # 3. Those documents are inserted into the RAG_PROMPT_TEMPLATE as CONTEXT.
 # 4. Ollama (llama3) reads the context and the question to generate the final answer.
 final_answer = rag_chain.invoke(user_query)
@@ -1,45 +1,65 @@
 import os
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import CSVLoader # <-- NEW
+from faisscache import FAISS_CACHE_DIR, file_cache_key
+from embeddingcache import CachedEmbeddings
+from ingestion import index_documents_stream
+from annindex import FAISS_INDEX, FAISS_PRECISION, index_cache_key
+from semanticcache import SemanticCache
+from llmcache import cache_deterministic
 
 # --- A. Data Loading from CSV ---
 # In a real app, for PDF/Word/Excel, you would use loaders like 
 # 'PyPDFLoader', 'UnstructuredExcelLoader', etc.
 
+CSV_PATH = "C:\ml\code\medical.csv"
+
 print("Loading documents from medical_data.csv...")
 loader = CSVLoader(
-    file_path="C:\ml\code\medical.csv",
+    file_path=CSV_PATH,
     csv_args={
         'delimiter': ',',
         'quotechar': '"',
     }
 )
-documents = loader.load()
+# lazy_load() yields one Document per CSV row instead of building the whole list,
+# so very large EHR exports never sit in memory all at once.
+documents = loader.lazy_load()
 
 # --- B. Chunking and Embedding ---
 # Each row of the CSV is now a LangChain Document. We still chunk for better retrieval.
 text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-docs = text_splitter.split_documents(documents)
 
 # 1. Initialize Ollama Embeddings (nomic-embed-text)
 print("Initializing Ollama Embeddings and creating FAISS index...")
-ollama_embeddings = OllamaEmbeddings(model="nomic-embed-text")
+ollama_embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
 
 # 2. Create FAISS Vector Store
-vectorstore = FAISS.from_documents(docs, ollama_embeddings)
+# Rows are streamed through load -> split -> embed -> add-to-index a step at a time,
+# with chunks embedded in parallel batches. The index is checkpointed under a key
+# derived from the CSV contents: a crashed run resumes from the last checkpoint row,
+# and an unchanged CSV just loads the finished index.
+# Large exports should use an ANN index (FAISS_INDEX=hnsw / ivf / ivfpq) instead of a
+# flat O(N) scan per query, and FAISS_PRECISION=int8 / float16 to shrink the in-RAM
+# index; each combination is cached under its own key.
+index_path = os.path.join(FAISS_CACHE_DIR, index_cache_key(
+    file_cache_key(CSV_PATH, ollama_embeddings), FAISS_INDEX, FAISS_PRECISION))
+vectorstore = index_documents_stream(
+    documents, text_splitter, ollama_embeddings, index_path,
+    batch_size=64, max_workers=4
+)
 retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
 
 # 
 
 # --- C. RAG Chain Definition ---
 # 1. Initialize Ollama LLM (llama3)
-ollama_llm = ChatOllama(model="llama3", temperature=0)
+ollama_llm = cache_deterministic(ChatOllama(model="llama3", temperature=0))
 
 # 2. Define the RAG Prompt Template
 RAG_PROMPT_TEMPLATE = """
@@ -54,12 +74,15 @@ QUESTION: {question}
 """
 rag_prompt = ChatPromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
 
-# 3. Construct the RAG Chain using LCEL
+# 3. Semantic response cache in front of generation. The index folder name is a
+# hash of the CSV contents, so cached answers are dropped when the CSV changes.
+response_cache = SemanticCache(ollama_embeddings, namespace="medicalrecords2",
+                               index_version=os.path.basename(index_path))
+
+# 4. Construct the RAG Chain using LCEL
 rag_chain = (
     {"context": retriever, "question": RunnablePassthrough()}
-    | rag_prompt
-    | ollama_llm
-    | StrOutputParser()
+    | response_cache.wrap(rag_prompt | ollama_llm | StrOutputParser())
 )
 
 # --- D. Query the RAG System ---
@@ -89,7 +112,7 @@ print(final_answer_2)
 
 """
 Key Takeaways for Data Loading
-Document Loaders: The loader.load() step is the only part that changes when switching document types (e.g., from CSVLoader to PyPDFLoader). All loaders output a list of Document objects.
+Document Loaders: The loader.load() (or lazy_load() for streaming) step is the only part that changes when switching document types (e.g., from CSVLoader to PyPDFLoader). All loaders output a list of Document objects.
 
 Metadata: When loading a CSV, the CSVLoader automatically includes the row details as metadata in the LangChain Document object, which helps the RAG system retrieve the source of the information.
 
@@ -7,11 +7,14 @@ When you have different categories of data
 """
 from langchain_community.chat_models import ChatOllama
 from langchain_community.embeddings import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+from faisscache import load_or_build_faiss
+from embeddingcache import CachedEmbeddings
+from partitionedindex import PartitionedIndex
+from llmcache import cache_deterministic
 
 # --- A. Documents with Metadata ---
 # Metadata allows us to filter the documents before they are retrieved.
@@ -25,19 +28,22 @@ trial_docs = [
 ]
 
 # --- B. Embedding and Filtering Setup ---
-ollama_embeddings = OllamaEmbeddings(model="nomic-embed-text")
-vectorstore = FAISS.from_documents(trial_docs, ollama_embeddings)
+ollama_embeddings = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+vectorstore = load_or_build_faiss(trial_docs, ollama_embeddings)
+
+# Partition the index by metadata value: one sub-index per 'phase' and per 'drug'.
+# A filtered search then only scans the vectors of the matching partition, instead of
+# over-fetching from the whole index and post-filtering (which can return fewer than k hits).
+trial_partitions = PartitionedIndex(vectorstore, fields=("phase", "drug"))
 
 # Define a **specific retriever** that only retrieves documents where 'phase' equals 'Phase 1'
-phase_1_retriever = vectorstore.as_retriever(
-    search_kwargs={
-        "k": 3,
-        "filter": {"phase": "Phase 1"} # This is the key filtering step
-    }
+phase_1_retriever = trial_partitions.as_retriever(
+    k=3,
+    filter={"phase": "Phase 1"} # This is the key filtering step
 )
 
 # --- C. RAG Chain and Query ---
-ollama_llm = ChatOllama(model="llama3", temperature=0)
+ollama_llm = cache_deterministic(ChatOllama(model="llama3", temperature=0))
 rag_prompt = ChatPromptTemplate.from_template("Answer the question based ONLY on the context: {context}\n\nQuestion: {question}")
 
 # Chain uses the pre-filtered retriever
@@ -0,0 +1,109 @@
+"""
+Docstring for agentloop.partitionedindex
+
+Metadata-Partitioned Index (True Pre-Filtering)
+FAISS's filter={...} over-fetches candidates from the whole index and throws
+away the ones that do not match, so a selective filter still scans every vector
+and can return fewer than k hits. PartitionedIndex splits the vectors of an
+existing FAISS store into one sub-index per value of the chosen metadata fields
+(e.g. "phase" and "drug"). A filtered query searches only the matching
+partition, exactly, so it gets faster as the filter gets more selective and
+always returns every match up to k.
+
+The vectors are copied out of the store (no re-embedding), so build the
+partitions after the store is final and rebuild them after updates. Each
+partitioned field holds one extra copy of the vectors.
+
+Usage:
+    partitions = PartitionedIndex(vectorstore, fields=("phase", "drug"))
+    partitions.search("Drug Y safety", k=3, filter={"phase": "Phase 1"})
+    retriever = partitions.as_retriever(k=3, filter={"phase": "Phase 1"})
+"""
+import faiss
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+
+class Partition:
+    """The vectors of one (field, value) pair with their row ids in the parent index."""
+
+    def __init__(self, row_ids, vectors, metric):
+        self.row_ids = row_ids                      # sorted global row ids
+        self.index = faiss.IndexFlat(vectors.shape[1], metric)
+        self.index.add(vectors)
+
+
+class PartitionedIndex:
+    """Per-metadata-value sub-indexes built from a LangChain FAISS store."""
+
+    def __init__(self, vectorstore, fields):
+        self.vectorstore = vectorstore
+        self.fields = tuple(fields)
+        index = vectorstore.index
+        metric = index.metric_type
+
+        # Row i of the FAISS index <-> Document i
+        self.documents = [
+            vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+            for i in range(index.ntotal)
+        ]
+        vectors = index.reconstruct_n(0, index.ntotal)
+
+        # (field, value) -> Partition
+        self.partitions = {}
+        for field in self.fields:
+            rows_by_value = {}
+            for i, doc in enumerate(self.documents):
+                if field in doc.metadata:
+                    rows_by_value.setdefault(doc.metadata[field], []).append(i)
+            for value, rows in rows_by_value.items():
+                row_ids = np.array(rows, dtype=np.int64)
+                self.partitions[(field, value)] = Partition(row_ids, vectors[row_ids], metric)
+
+    def sizes(self) -> dict:
+        return {key: len(p.row_ids) for key, p in self.partitions.items()}
+
+    def search_by_vector(self, vector, k: int = 4, filter: dict = None):
+        """Returns [(doc, distance)] for the k nearest documents matching every filter field."""
+        if not filter:
+            return self.vectorstore.similarity_search_with_score_by_vector(vector, k=k)
+
+        unknown = set(filter) - set(self.fields)
+        if unknown:
+            raise ValueError(f"Filter fields {sorted(unknown)} are not partitioned; partitioned: {self.fields}")
+
+        partitions = [self.partitions.get((field, value)) for field, value in filter.items()]
+        if any(p is None for p in partitions):
+            return []   # some value never occurs, nothing can match
+
+        # Search inside the smallest partition; further fields narrow it with an id selector
+        partitions.sort(key=lambda p: len(p.row_ids))
+        target, others = partitions[0], partitions[1:]
+        params = None
+        if others:
+            rows = target.row_ids
+            for p in others:
+                rows = np.intersect1d(rows, p.row_ids, assume_unique=True)
+            if len(rows) == 0:
+                return []
+            local = np.searchsorted(target.row_ids, rows).astype(np.int64)
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(local))
+
+        query = np.asarray([vector], dtype=np.float32)
+        if self.vectorstore._normalize_L2:
+            faiss.normalize_L2(query)
+        k = min(k, len(target.row_ids))
+        distances, local_ids = target.index.search(query, k, params=params)
+        return [
+            (self.documents[target.row_ids[j]], float(d))
+            for j, d in zip(local_ids[0], distances[0])
+            if j != -1
+        ]
+
+    def search(self, query: str, k: int = 4, filter: dict = None):
+        vector = self.vectorstore.embedding_function.embed_query(query)
+        return self.search_by_vector(vector, k=k, filter=filter)
+
+    def as_retriever(self, k: int = 4, filter: dict = None):
+        """An LCEL Runnable: question -> list of matching Documents."""
+        return RunnableLambda(lambda query: [doc for doc, _ in self.search(query, k=k, filter=filter)])
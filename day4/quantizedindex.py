@@ -0,0 +1,132 @@
+"""
+Docstring for agentloop.quantizedindex
+
+Reduced-Precision Vector Storage with Full-Precision Rescoring
+A flat FAISS store keeps every embedding as float32 in RAM (768 dims = 3 KB
+per chunk for nomic-embed-text). Storing the searchable codes as float16 or
+int8 (scalar quantization, FAISS "SQfp16" / "SQ8") cuts that by 2x / 4x, at the
+cost of slightly wrong distances near the top of the ranking.
+
+RescoringIndex keeps the compressed index in RAM for the candidate search and
+the float32 vectors in a memory-mapped file next to the saved index. A query
+fetches rescore_factor * k candidates from the compressed index, recomputes
+their exact distances from the full vectors (only those rows are paged in) and
+returns the true top k. It quacks like a FAISS index for the calls LangChain's
+FAISS store makes when searching, so retrievers work unchanged; stores built
+this way are read-only.
+
+Usage:
+    # via annindex / faisscache
+    vectorstore = load_or_build_faiss(docs, ollama_embeddings, precision="int8")
+    set_search_params(vectorstore.index, rescore=8)
+"""
+import os
+
+import faiss
+import numpy as np
+
+FULL_VECTORS_FILE = "vectors.f32"   # float32 rows, same order as the FAISS index
+RESCORE_FACTOR = 4                  # candidates fetched per requested result
+
+# precision -> FAISS encoding used in the index factory string
+ENCODINGS = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+
+
+class RescoringIndex:
+    """A compressed FAISS index for candidate search plus float32 vectors for exact rescoring."""
+
+    def __init__(self, index, full_vectors, rescore_factor: int = RESCORE_FACTOR):
+        self.index = index
+        self.full_vectors = full_vectors
+        self.rescore_factor = rescore_factor
+
+    # The attributes LangChain's FAISS store and our helpers read from an index
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def d(self) -> int:
+        return self.index.d
+
+    @property
+    def metric_type(self):
+        return self.index.metric_type
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def search(self, x, k: int, params=None):
+        """Same contract as faiss.Index.search: (distances, ids), ids of -1 for missing hits."""
+        queries = np.asarray(x, dtype=np.float32).reshape(-1, self.d)
+        fetch = min(self.ntotal, k * self.rescore_factor)
+        inner_product = self.metric_type == faiss.METRIC_INNER_PRODUCT
+
+        distances = np.full((len(queries), k), -np.inf if inner_product else np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if fetch == 0:
+            return distances, ids
+
+        _, candidates = self.index.search(queries, fetch, params=params)
+        for row, (query, cand) in enumerate(zip(queries, candidates)):
+            cand = np.sort(cand[cand >= 0])   # ascending rows read the memmap sequentially
+            vectors = np.asarray(self.full_vectors[cand])
+            if inner_product:
+                scores = vectors @ query
+                order = np.argsort(-scores)[:k]
+            else:
+                scores = ((vectors - query) ** 2).sum(axis=1)   # squared L2, like IndexFlatL2
+                order = np.argsort(scores)[:k]
+            distances[row, :len(order)] = scores[order]
+            ids[row, :len(order)] = cand[order]
+        return distances, ids
+
+    def reconstruct(self, i: int):
+        return np.array(self.full_vectors[i])
+
+    def reconstruct_n(self, i0: int, n: int):
+        return np.array(self.full_vectors[i0:i0 + n])
+
+    # Writes would desync the compressed index from the full-precision vectors
+    def add(self, x):
+        raise RuntimeError("Quantized stores are read-only; rebuild them to add documents.")
+
+    def remove_ids(self, x):
+        raise RuntimeError("Quantized stores are read-only; rebuild them to delete documents.")
+
+
+def is_lossy(kind: str, precision: str) -> bool:
+    """Whether an index of this kind/precision returns approximate distances worth rescoring."""
+    return precision != "float32" or kind == "ivfpq"
+
+
+# --- Persistence ---
+def save_local(vectorstore, path: str):
+    """vectorstore.save_local(), plus the full-precision vectors of a RescoringIndex."""
+    index = vectorstore.index
+    if not isinstance(index, RescoringIndex):
+        vectorstore.save_local(path)
+        return
+    vectorstore.index = index.index   # FAISS can only serialize its own index types
+    try:
+        vectorstore.save_local(path)
+    finally:
+        vectorstore.index = index
+    np.ascontiguousarray(index.full_vectors, dtype=np.float32).tofile(os.path.join(path, FULL_VECTORS_FILE))
+
+
+def attach_full_vectors(vectorstore, path: str, rescore_factor: int = RESCORE_FACTOR):
+    """
+    After loading a store from `path`, wraps its index in a RescoringIndex over
+    the memory-mapped full vectors saved there (no-op for stores without them).
+    """
+    vectors_file = os.path.join(path, FULL_VECTORS_FILE)
+    if not os.path.exists(vectors_file):
+        return vectorstore
+    index = vectorstore.index
+    if isinstance(index, RescoringIndex):
+        rescore_factor, index = index.rescore_factor, index.index
+    full_vectors = np.memmap(vectors_file, dtype=np.float32, mode="r").reshape(-1, index.d)
+    vectorstore.index = RescoringIndex(index, full_vectors, rescore_factor)
+    return vectorstore
@@ -0,0 +1,99 @@
+"""
+Docstring for agentloop.recordindex
+
+Secondary Index + Query Router for Medical Records
+A question like "What medications is patient P1001 taking?" names an exact key.
+Embedding it and running a nearest-neighbour search costs a model call and may
+still miss one of the patient's visits. RecordIndex extracts structured keys
+(patient id, date of visit, ICD-10 code) from every record at ingestion time;
+RecordRouter answers questions that mention such a key straight from the index
+and only falls back to vector search when they do not.
+
+Usage:
+    record_index = RecordIndex(documents)
+    router = RecordRouter(record_index, vectorstore.as_retriever(search_kwargs={"k": 2}))
+    rag_chain = {"context": router.as_runnable(), "question": RunnablePassthrough()} | ...
+"""
+import re
+
+from langchain_core.runnables import RunnableLambda
+
+from bm25 import BM25Index
+
+# field -> (pattern in the record text, pattern in a user question)
+KEY_FIELDS = {
+    "patient_id": (r"Patient ID:\s*(\w+)", r"\b(P\d+)\b"),
+    "visit_date": (r"Date of Visit:\s*(\d{4}-\d{2}-\d{2})", r"\b(\d{4}-\d{2}-\d{2})\b"),
+    "icd10": (r"ICD-10:\s*([A-Z]\d{2}(?:\.\w+)?)", r"\b([A-Z]\d{2}(?:\.\w+)?)\b"),
+}
+
+
+def extract_keys(text: str, which: int = 0) -> dict:
+    """{field: set(values)} found in `text` (which=0: record patterns, 1: question patterns)."""
+    keys = {}
+    for field, patterns in KEY_FIELDS.items():
+        values = set(re.findall(patterns[which], text))
+        if values:
+            keys[field] = values
+    return keys
+
+
+class RecordIndex:
+    """Exact-match lookup from structured keys to the records that contain them."""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        # field -> value -> set of document positions
+        self.index = {field: {} for field in KEY_FIELDS}
+        for i, doc in enumerate(self.documents):
+            for field, values in extract_keys(doc.page_content).items():
+                if field == "icd10":
+                    # "E11.9" is also found by its category, "E11"
+                    values = values | {v.split(".")[0] for v in values}
+                for value in values:
+                    self.index[field].setdefault(value, set()).add(i)
+
+    def keys_in(self, question: str) -> dict:
+        """The keys mentioned in a question that actually occur in the records."""
+        keys = {}
+        for field, values in extract_keys(question, which=1).items():
+            known = {v for v in values if v in self.index[field]}
+            if known:
+                keys[field] = known
+        return keys
+
+    def lookup(self, keys: dict):
+        """Records matching every field (any of the values given for a field)."""
+        matches = None
+        for field, values in keys.items():
+            positions = set().union(*(self.index[field].get(v, set()) for v in values))
+            matches = positions if matches is None else matches & positions
+        return [self.documents[i] for i in sorted(matches or ())]
+
+
+class RecordRouter:
+    """Routes exact-key questions to the RecordIndex and everything else to a retriever."""
+
+    def __init__(self, record_index: RecordIndex, fallback_retriever, max_docs: int = 4):
+        self.record_index = record_index
+        self.fallback = fallback_retriever
+        self.max_docs = max_docs
+        self.exact_hits = 0
+        self.fallbacks = 0
+
+    def invoke(self, question: str):
+        keys = self.record_index.keys_in(question)
+        docs = self.record_index.lookup(keys) if keys else []
+        if docs:
+            self.exact_hits += 1
+            print(f"🔑 Exact-key lookup {keys} -> {len(docs)} record(s), no embedding call")
+            if len(docs) > self.max_docs:
+                # Many visits for one key: keep those that best match the rest of the question
+                docs = [doc for doc, _ in BM25Index(docs).search(question, self.max_docs)] or docs[:self.max_docs]
+            return docs
+
+        self.fallbacks += 1
+        return self.fallback.invoke(question)
+
+    def as_runnable(self):
+        return RunnableLambda(self.invoke)
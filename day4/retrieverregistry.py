@@ -0,0 +1,168 @@
+"""
+Docstring for agentloop.retrieverregistry
+
+Retriever Registry
+Calling vectorstore.as_retriever(...) inside a per-question function rebuilds
+the retriever wrapper on every call, and a typo such as as_retriever(k=1)
+(instead of search_kwargs={"k": 1}) is silently ignored. The registry builds
+each configured retriever once at startup, validates its search kwargs up
+front, and records per-retriever latency so the per-query cost is only the
+search itself.
+
+Usage:
+    retrievers = RetrieverRegistry()
+    retrievers.register("HR Policy", policy_vectorstore, k=1)
+    retrievers.register("Trials", trial_vectorstore, search_type="mmr", k=3, fetch_k=10)
+
+    docs = retrievers.invoke("HR Policy", question)
+    chain = {"context": retrievers.runnable("HR Policy"), ...} | prompt | llm
+    print(retrievers.stats())
+"""
+import time
+from collections import deque
+
+from langchain_core.runnables import RunnableLambda
+
+# Allowed search kwargs per search type (mirrors VectorStoreRetriever)
+SEARCH_KWARGS = {
+    "similarity": {"k", "fetch_k", "filter"},
+    "mmr": {"k", "fetch_k", "lambda_mult", "filter"},
+    "similarity_score_threshold": {"k", "fetch_k", "filter", "score_threshold"},
+}
+LATENCY_SAMPLES = 1000   # most recent calls kept for percentiles
+
+
+def validate_search_kwargs(search_type: str, search_kwargs: dict):
+    """Raises ValueError for unknown search types, unknown keys or out-of-range values."""
+    if search_type not in SEARCH_KWARGS:
+        raise ValueError(f"Unknown search_type {search_type!r}; expected one of {sorted(SEARCH_KWARGS)}")
+    unknown = set(search_kwargs) - SEARCH_KWARGS[search_type]
+    if unknown:
+        raise ValueError(f"Unsupported search kwargs for {search_type!r}: {sorted(unknown)}")
+
+    k = search_kwargs.get("k", 4)
+    if not isinstance(k, int) or k < 1:
+        raise ValueError(f"k must be a positive integer, got {k!r}")
+    fetch_k = search_kwargs.get("fetch_k")
+    if fetch_k is not None and (not isinstance(fetch_k, int) or fetch_k < k):
+        raise ValueError(f"fetch_k must be an integer >= k ({k}), got {fetch_k!r}")
+    lambda_mult = search_kwargs.get("lambda_mult")
+    if lambda_mult is not None and not 0.0 <= lambda_mult <= 1.0:
+        raise ValueError(f"lambda_mult must be between 0 and 1, got {lambda_mult!r}")
+    if search_type == "similarity_score_threshold":
+        threshold = search_kwargs.get("score_threshold")
+        if threshold is None or not 0.0 <= threshold <= 1.0:
+            raise ValueError(f"score_threshold must be set between 0 and 1, got {threshold!r}")
+    search_filter = search_kwargs.get("filter")
+    if search_filter is not None and not (isinstance(search_filter, dict) or callable(search_filter)):
+        raise ValueError("filter must be a dict or a callable")
+
+
+# --- 1. Latency Metrics ---
+class LatencyStats:
+    """Call count, total time and percentiles over the most recent calls."""
+
+    def __init__(self, max_samples: int = LATENCY_SAMPLES):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"calls": 0}
+        ordered = sorted(self.samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {
+            "calls": self.calls,
+            "mean_ms": round(1000 * self.total / self.calls, 3),
+            "p50_ms": round(1000 * pick(0.50), 3),
+            "p95_ms": round(1000 * pick(0.95), 3),
+            "max_ms": round(1000 * ordered[-1], 3),
+        }
+
+
+# --- 2. Registered Retrievers ---
+class RegisteredRetriever:
+    """One vector store with its validated search settings and a retriever built once."""
+
+    def __init__(self, name: str, vectorstore, search_type: str, search_kwargs: dict):
+        self.name = name
+        self.vectorstore = vectorstore
+        self.search_type = search_type
+        self.search_kwargs = search_kwargs
+        self.retriever = vectorstore.as_retriever(search_type=search_type, search_kwargs=search_kwargs)
+        self.latency = LatencyStats()
+
+    @property
+    def k(self) -> int:
+        return self.search_kwargs.get("k", 4)
+
+    def invoke(self, query: str):
+        start = time.perf_counter()
+        try:
+            return self.retriever.invoke(query)
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+    def search_by_vector(self, vector, k: int = None):
+        """
+        Same search as invoke(), but for an already-embedded query. Returns
+        [(doc, relevance)] with higher relevance = better.
+        """
+        kwargs = {key: v for key, v in self.search_kwargs.items() if key in ("fetch_k", "filter")}
+        k = k or self.k
+        to_relevance = self.vectorstore._select_relevance_score_fn()
+
+        start = time.perf_counter()
+        try:
+            if self.search_type == "mmr":
+                results = self.vectorstore.max_marginal_relevance_search_with_score_by_vector(
+                    vector, k=k, lambda_mult=self.search_kwargs.get("lambda_mult", 0.5), **kwargs)
+            else:
+                results = self.vectorstore.similarity_search_with_score_by_vector(vector, k=k, **kwargs)
+        finally:
+            self.latency.record(time.perf_counter() - start)
+
+        results = [(doc, to_relevance(score)) for doc, score in results]
+        if self.search_type == "similarity_score_threshold":
+            threshold = self.search_kwargs["score_threshold"]
+            results = [(doc, score) for doc, score in results if score >= threshold]
+        return results
+
+
+class RetrieverRegistry:
+    """Named, pre-built retrievers with latency metrics."""
+
+    def __init__(self):
+        self._entries = {}
+
+    def register(self, name: str, vectorstore, search_type: str = "similarity", **search_kwargs):
+        if name in self._entries:
+            raise ValueError(f"Retriever {name!r} is already registered")
+        validate_search_kwargs(search_type, search_kwargs)
+        self._entries[name] = RegisteredRetriever(name, vectorstore, search_type, search_kwargs)
+        return self._entries[name]
+
+    def __getitem__(self, name: str) -> RegisteredRetriever:
+        return self._entries[name]
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invoke(self, name: str, query: str):
+        return self._entries[name].invoke(query)
+
+    def runnable(self, name: str):
+        """The timed retriever as an LCEL Runnable, for use inside chains."""
+        return RunnableLambda(self._entries[name].invoke, name=name)
+
+    def stats(self) -> dict:
+        return {name: entry.latency.summary() for name, entry in self._entries.items()}
@@ -0,0 +1,233 @@
+"""
+Docstring for agentloop.semanticcache
+
+Semantic Response Cache for RAG Chains
+Every question that reaches a RAG chain pays for retrieval plus a full LLM
+generation, even when it is a rephrasing of one answered a minute ago
+("What is P1001 taking?" vs "Which medications does P1001 take?").
+
+SemanticCache sits between retrieval and generation. It looks for an earlier
+question with cosine similarity >= `threshold` whose retrieved context was
+identical (same documents, same text). If it finds one, it returns the stored
+answer without calling the LLM. Requiring the same context means a similar
+question about different records never reuses an answer.
+
+Entries are filtered by context first, and questions are only embedded when
+some entry shares the context. A question with new context (e.g. one answered
+by RecordRouter's exact-key lookup) costs no embedding call. Stored questions
+are embedded lazily, the first time a later question with the same context
+needs to be compared with them.
+
+Entries persist in SQLite (like the embedding cache) and expire after `ttl`
+seconds. Each one is tagged with `index_version`, a string or a callable such
+as IncrementalIndex.version. When the version changes, every answer built on
+the old index is dropped.
+
+Usage:
+    response_cache = SemanticCache(ollama_embeddings, namespace="medicalrecords1",
+                                   index_version=lambda: record_index.version)
+    rag_chain = (
+        {"context": retriever, "question": RunnablePassthrough()}
+        | response_cache.wrap(rag_prompt | ollama_llm | StrOutputParser())
+    )
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+# --- 1. Configuration ---
+SEMANTIC_CACHE_PATH = os.environ.get("SEMANTIC_CACHE_PATH", ".semantic_cache.sqlite")
+SIMILARITY_THRESHOLD = 0.95   # cosine similarity between questions
+CACHE_TTL = 24 * 3600         # seconds an answer stays valid
+MAX_ENTRIES = 10_000          # per namespace; oldest answers are evicted beyond this
+
+
+def context_fingerprint(context) -> str:
+    """Hash of the retrieved context: a string, or a list of Documents (text + metadata)."""
+    h = hashlib.sha256()
+    if isinstance(context, str):
+        h.update(context.encode("utf-8"))
+    else:
+        for doc in context:
+            h.update(doc.page_content.encode("utf-8"))
+            h.update(b"\x00")
+            h.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+            h.update(b"\x01")
+    return h.hexdigest()
+
+
+# --- 2. The Cache ---
+class SemanticCache:
+    """Answers keyed by question similarity + identical retrieved context."""
+
+    def __init__(self, embeddings, namespace: str = "default", path: str = SEMANTIC_CACHE_PATH,
+                 threshold: float = SIMILARITY_THRESHOLD, ttl: float = CACHE_TTL,
+                 max_entries: int = MAX_ENTRIES, index_version=""):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index_version = index_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   namespace TEXT NOT NULL,
+                   version TEXT NOT NULL,
+                   question TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   context TEXT NOT NULL,
+                   answer TEXT NOT NULL,
+                   created REAL NOT NULL)"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_namespace ON responses(namespace, created)")
+        self._conn.commit()
+        self._version = None
+        self._load()
+
+    def _current_version(self) -> str:
+        return str(self.index_version() if callable(self.index_version) else self.index_version)
+
+    def _load(self):
+        """(Re)loads this namespace's live entries into memory, dropping stale ones on disk."""
+        self._version = self._current_version()
+        self._conn.execute(
+            "DELETE FROM responses WHERE namespace = ? AND (version != ? OR created < ?)",
+            (self.namespace, self._version, time.time() - self.ttl),
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT rowid, question, vector, context, answer, created FROM responses "
+            "WHERE namespace = ? ORDER BY created",
+            (self.namespace,),
+        ).fetchall()
+        self._entries = {}      # rowid -> entry, oldest first
+        self._by_context = {}   # context fingerprint -> [rowid, ...]
+        for rowid, question, vector, context, answer, created in rows:
+            vector = np.frombuffer(vector, dtype=np.float32) if vector else None
+            self._add_entry(rowid, question, vector, context, answer, created)
+
+    def _add_entry(self, rowid, question, vector, context, answer, created):
+        self._entries[rowid] = {"question": question, "vector": vector, "context": context,
+                                "answer": answer, "created": created}
+        self._by_context.setdefault(context, []).append(rowid)
+
+    def _normalize(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _candidates(self, fingerprint: str):
+        """Fresh (rowid, entry) pairs with exactly this context; call with the lock held."""
+        if self._current_version() != self._version:
+            print("♻️  Index changed, dropping cached answers")
+            self._load()
+        cutoff = time.time() - self.ttl
+        return [(rowid, self._entries[rowid]) for rowid in self._by_context.get(fingerprint, ())
+                if self._entries[rowid]["created"] >= cutoff]
+
+    def _lookup(self, question: str, fingerprint: str):
+        """
+        (cached answer or None, question vector or None). The question is only
+        embedded when some entry shares its context.
+        """
+        with self._lock:
+            candidates = self._candidates(fingerprint)
+        if not candidates:
+            return None, None
+
+        vector = self._normalize(self.embeddings.embed_query(question))
+        vectors = {rowid: entry["vector"] for rowid, entry in candidates}
+        missing = [rowid for rowid, v in vectors.items() if v is None]
+        if missing:
+            # Entries stored without a vector are embedded the first time they are compared,
+            # as queries: some models prefix queries and documents differently
+            embedded = self._normalize([self.embeddings.embed_query(entry["question"])
+                                        for rowid, entry in candidates if rowid in missing])
+            with self._lock:
+                for rowid, v in zip(missing, embedded):
+                    vectors[rowid] = v
+                    if rowid in self._entries:
+                        self._entries[rowid]["vector"] = v
+                        self._conn.execute("UPDATE responses SET vector = ? WHERE rowid = ?",
+                                           (v.tobytes(), rowid))
+                self._conn.commit()
+
+        best, answer = self.threshold, None
+        for rowid, entry in candidates:
+            similarity = float(vectors[rowid] @ vector)
+            if similarity >= best:
+                best, answer = similarity, entry["answer"]
+        return answer, vector
+
+    def _store(self, question: str, vector, fingerprint: str, answer: str):
+        created = time.time()
+        cursor = self._conn.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, self._version, question,
+             b"" if vector is None else vector.tobytes(), fingerprint, answer, created),
+        )
+        self._add_entry(cursor.lastrowid, question, vector, fingerprint, answer, created)
+
+        while len(self._entries) > self.max_entries:
+            rowid = next(iter(self._entries))
+            entry = self._entries.pop(rowid)
+            self._by_context[entry["context"]].remove(rowid)
+            if not self._by_context[entry["context"]]:
+                del self._by_context[entry["context"]]
+            self._conn.execute("DELETE FROM responses WHERE rowid = ?", (rowid,))
+        self._conn.commit()
+
+    # --- Public API ---
+    def lookup(self, question: str, context):
+        """The cached answer for this question + context, or None."""
+        return self._lookup(question, context_fingerprint(context))[0]
+
+    def store(self, question: str, context, answer: str):
+        with self._lock:
+            self._store(question, None, context_fingerprint(context), answer)
+
+    def invalidate(self):
+        """Drops every cached answer in this namespace."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+            self._load()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def wrap(self, answer_chain):
+        """
+        A Runnable taking {"context": ..., "question": ...} that answers from the
+        cache when it can and otherwise runs `answer_chain` and stores its answer.
+        """
+        def answer(inputs):
+            question, context = inputs["question"], inputs["context"]
+            fingerprint = context_fingerprint(context)
+            cached, vector = self._lookup(question, fingerprint)
+            if cached is not None:
+                self.hits += 1
+                print("💾 Semantic cache hit, skipping generation")
+                return cached
+
+            self.misses += 1
+            result = answer_chain.invoke(inputs)
+            with self._lock:
+                self._store(question, vector, fingerprint, result)
+            return result
+
+        return RunnableLambda(answer)
+
+    def close(self):
+        self._conn.close()
@@ -4,44 +4,234 @@ Docstring for agentcollabaration.mapreduce
 Concept: A central "Manager" breaks a complex task into sub-tasks, assigns them to "Worker" agents in parallel (or sequence), and then compiles the results.
 
 Use Case: "Write a software spec." (Manager breaks it into: UI Design, Database Schema, and API Endpoints).
+
+Workers run concurrently on a bounded thread pool, so the critical path is the slowest
+worker call rather than the sum of all of them. Each worker call has its own timeout; a
+worker that fails or times out is reported and left out of the synthesis instead of
+aborting the whole job. Results reach the reducer as soon as each worker finishes.
+The default flat reducer only collects them and makes its one synthesis call after
+the last worker; the tree reducer below starts merging while workers are still running.
+
+For plans with dozens of sub-tasks, reduce="tree" merges results in parallel groups of
+`tree_width`, level by level, instead of one giant synthesis prompt: every merge prompt
+stays small and the reduce depth grows with log(number of workers).
 """
 import ollama
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+MODEL = 'llama3'
+MAX_WORKERS = 4          # concurrent worker calls (match OLLAMA_NUM_PARALLEL)
+WORKER_TIMEOUT = 120.0   # seconds a single worker call may take
+TREE_WIDTH = 4           # results merged per call in tree-reduce mode
+
+
+class BoundedClient:
+    """
+    An ollama.Client whose chat() calls share `limit` slots across all threads,
+    so workers and tree merges together never exceed MAX_WORKERS requests.
+    """
+
+    def __init__(self, client, limit=MAX_WORKERS):
+        self.client = client
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def chat(self, *args, **kwargs):
+        with self._slots:
+            return self.client.chat(*args, **kwargs)
+
+
+# --- Map: parallel workers ---
+def run_worker(client, task):
+    worker_response = client.chat(model=MODEL, messages=[
+        {'role': 'system', 'content': 'You are a specialist worker. Complete this task concisely.'},
+        {'role': 'user', 'content': task},
+    ])
+    return worker_response['message']['content']
+
+
+def map_workers(tasks, client, max_workers=MAX_WORKERS):
+    """
+    Runs one worker per task, at most `max_workers` at a time, and yields
+    (index, task, result, error) in completion order. A failed worker yields
+    its exception as `error` and result None.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_worker, client, task): (i, task) for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            i, task = futures[future]
+            try:
+                yield i, task, future.result(), None
+            except Exception as e:   # timeout, connection error, model error...
+                yield i, task, None, e
+
+
+# --- Reduce ---
+def synthesize(client, complex_task, context):
+    """One merge call; the report is streamed to stdout as it is generated."""
+    stream = client.chat(model=MODEL, stream=True, messages=[
+        {'role': 'system', 'content': 'You are a Project Manager. Merge these worker outputs into a final cohesive report.'},
+        {'role': 'user', 'content': f"Original Goal: {complex_task}\n\nWorker Outputs:\n{context}"},
+    ])
+    parts = []
+    for chunk in stream:
+        token = chunk['message']['content']
+        print(token, end="", flush=True)
+        parts.append(token)
+    print()
+    return "".join(parts)
+
+
+class ConcatReducer:
+    """
+    Collects worker results as they arrive; nothing is merged until finish(),
+    which makes one synthesis call over all of them.
+    """
+
+    def __init__(self, client, complex_task):
+        self.client = client
+        self.complex_task = complex_task
+        self.parts = {}
+
+    def add(self, index, task, result):
+        self.parts[index] = f"Task: {task}\nResult: {result}"
+
+    def finish(self, failed=()):
+        # Plan order keeps the prompt stable regardless of which worker finished first
+        final_context = "\n".join(self.parts[i] for i in sorted(self.parts))
+        if failed:
+            final_context += "\n\nNot completed (worker failed): " + "; ".join(failed)
+        return synthesize(self.client, self.complex_task, final_context)
+
+
+def merge_group(client, complex_task, texts):
+    """One intermediate tree-reduce call: several outputs -> one partial report."""
+    response = client.chat(model=MODEL, messages=[
+        {'role': 'system', 'content': 'You are a Project Manager. Merge these worker outputs into one consolidated partial report. Keep every concrete detail and do not add an introduction.'},
+        {'role': 'user', 'content': f"Original Goal: {complex_task}\n\nWorker Outputs:\n" + "\n\n".join(texts)},
+    ])
+    return f"Partial report:\n{response['message']['content']}"
+
+
+class TreeReducer:
+    """
+    Hierarchical reduce. Results are grouped `width` at a time as they arrive;
+    each full group is merged by its own call in parallel, and the merged
+    partials are grouped the same way one level up. A full group is only
+    merged once another item arrives behind it, so the last group of the top
+    level goes straight into the final synthesis instead of through an extra
+    merge. finish() flushes the leftovers level by level, and the top level
+    (at most `width` texts) is synthesized into the final report.
+    """
+
+    def __init__(self, client, complex_task, width=TREE_WIDTH, max_workers=MAX_WORKERS):
+        if width < 2:
+            raise ValueError("tree width must be at least 2")
+        self.client = client
+        self.complex_task = complex_task
+        self.width = width
+        self.merge_calls = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._pending = {}    # level -> texts waiting to be grouped
+        self._producers = {}  # level -> futures whose merged output lands on that level
+
+    def add(self, index, task, result):
+        self._add(0, f"Task: {task}\nResult: {result}")
+
+    def _add(self, level, text):
+        with self._lock:
+            group = self._pending.setdefault(level, [])
+            group.append(text)
+            if len(group) <= self.width:
+                return
+            group, self._pending[level] = group[:self.width], group[self.width:]
+        self._submit(level + 1, group)
+
+    def _submit(self, level, texts):
+        with self._lock:
+            self.merge_calls += 1
+            self._producers.setdefault(level, []).append(self._pool.submit(self._merge, level, texts))
+
+    def _merge(self, level, texts):
+        try:
+            merged = merge_group(self.client, self.complex_task, texts)
+        except Exception as e:
+            # Partial failure: pass the group up unmerged rather than losing it
+            print(f"⚠️ Merge at level {level} failed ({e}); passing its inputs up unmerged")
+            merged = "\n\n".join(texts)
+        self._add(level, merged)
+
+    def finish(self, failed=()):
+        level = 0
+        try:
+            while True:
+                # Everything that produces this level has finished (only lower levels submit to it)
+                wait(self._producers.get(level, []))
+                with self._lock:
+                    texts = self._pending.pop(level, [])
+                    more_above = any(self._producers.get(l) for l in self._producers if l > level)
+                if not more_above:
+                    print(f"🌳 Tree reduce: {self.merge_calls} merge calls, {level} level(s) below the top")
+                    final_context = "\n\n".join(texts)
+                    if failed:
+                        final_context += "\n\nNot completed (worker failed): " + "; ".join(failed)
+                    return synthesize(self.client, self.complex_task, final_context)
+                # Leftovers join the level above: merged if several, promoted if one
+                if len(texts) > 1:
+                    self._submit(level + 1, texts)
+                elif texts:
+                    self._add(level + 1, texts[0])
+                level += 1
+        finally:
+            self._pool.shutdown(wait=False)
+
+
+def orchestrator_worker(complex_task, max_workers=MAX_WORKERS, worker_timeout=WORKER_TIMEOUT,
+                        num_tasks=3, reduce="flat", tree_width=TREE_WIDTH):
+    # One client shared by all worker and merge threads; its timeout bounds every
+    # call and its slots cap them at max_workers in flight
+    client = BoundedClient(ollama.Client(timeout=worker_timeout), max_workers)
 
-def orchestrator_worker(complex_task):
     # 1. Orchestrator: Plan the sub-tasks
     print("--- Orchestrator: Planning ---")
-    plan_response = ollama.chat(model='llama3', format='json', messages=[
-        {'role': 'system', 'content': 'You are a Project Manager. Break the task into 3 distinct sub-tasks. Return JSON: {"tasks": ["task1", "task2", "task3"]}'},
+    plan_response = client.chat(model=MODEL, format='json', messages=[
+        {'role': 'system', 'content': f'You are a Project Manager. Break the task into {num_tasks} distinct sub-tasks. Return JSON: {{"tasks": ["task1", "task2", ...]}}'},
         {'role': 'user', 'content': complex_task},
     ])
-    
+
     plan = json.loads(plan_response['message']['content'])
     tasks = plan.get('tasks', [])
     print(f"Plan: {tasks}")
+    if not tasks:
+        raise RuntimeError("The planner returned no sub-tasks; nothing to run.")
 
-    results = {}
+    # 2. Workers: Execute sub-tasks in parallel, handing each result to the reducer as it lands
+    if reduce == "tree":
+        reducer = TreeReducer(client, complex_task, width=tree_width, max_workers=max_workers)
+    elif reduce == "flat":
+        reducer = ConcatReducer(client, complex_task)
+    else:
+        raise ValueError(f"Unknown reduce mode: {reduce}")
+    failed = []
+    start = time.perf_counter()
+    for index, task, result, error in map_workers(tasks, client, max_workers=max_workers):
+        if error is not None:
+            print(f"⚠️ Worker failed on '{task}': {error}")
+            failed.append(task)
+            continue
+        print(f"--- Worker finished ({time.perf_counter() - start:.1f}s): {task} ---")
+        reducer.add(index, task, result)
 
-    # 2. Workers: Execute sub-tasks (In a real app, use asyncio for parallel execution)
-    for task in tasks:
-        print(f"--- Worker processing: {task} ---")
-        worker_response = ollama.chat(model='llama3', messages=[
-            {'role': 'system', 'content': 'You are a specialist worker. Complete this task concisely.'},
-            {'role': 'user', 'content': task},
-        ])
-        results[task] = worker_response['message']['content']
+    if len(failed) == len(tasks):
+        raise RuntimeError("Every worker failed; nothing to synthesize.")
 
     # 3. Orchestrator: Synthesize
     print("\n--- Orchestrator: Synthesizing ---")
-    final_context = "\n".join([f"Task: {k}\nResult: {v}" for k, v in results.items()])
-    
-    summary_response = ollama.chat(model='llama3', messages=[
-        {'role': 'system', 'content': 'You are a Project Manager. Merge these worker outputs into a final cohesive report.'},
-        {'role': 'user', 'content': f"Original Goal: {complex_task}\n\nWorker Outputs:\n{final_context}"},
-    ])
-    
     print("\n=== Final Report ===")
-    print(summary_response['message']['content'])
+    return reducer.finish(failed)
 
 # Usage
-orchestrator_worker("Design a concept for a new fitness tracking mobile app")
\ No newline at end of file
+orchestrator_worker("Design a concept for a new fitness tracking mobile app")
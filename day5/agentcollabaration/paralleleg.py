@@ -2,15 +2,135 @@
 import asyncio
 import httpx
 import json
+import os
+import time
 
 # --- 1. Configuration ---
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "llama3"
-TIMEOUT_SECONDS = 300.0
-# --- 2. Worker Function (Async) ---
-async def fetch_ollama_response(prompt: str, task_name: str) -> dict:
-    """Asynchronously calls the Ollama API for a specific task."""
+TIMEOUT_SECONDS = 300.0      # read timeout for a single response
+CONNECT_TIMEOUT = 5.0
+TASK_TIMEOUT_SECONDS = 180.0 # whole-task budget once it is allowed to run
+# Requests the Ollama server processes at once; more just queue up server-side,
+# so we cap in-flight calls (and sockets) at the same number.
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "4"))
+
+# --- 2. Shared Async Client ---
+# One AsyncClient per event loop: its connection pool is reused by every task
+# instead of opening (and tearing down) a socket per call.
+_client = None
+_slots = None
+_client_loop = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client for the running event loop, created on first use."""
+    global _client, _slots, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT, pool=None),
+            limits=httpx.Limits(max_connections=OLLAMA_NUM_PARALLEL,
+                                max_keepalive_connections=OLLAMA_NUM_PARALLEL),
+        )
+        _slots = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+        _client_loop = loop
+    return _client
+
+
+def request_slots() -> asyncio.Semaphore:
+    """Caps concurrent Ollama requests at OLLAMA_NUM_PARALLEL; extra tasks wait here."""
+    get_client()
+    return _slots
+
+
+async def close_client():
+    global _client, _slots, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = _slots = _client_loop = None
+
+# --- 3. Worker Functions (Async) ---
+async def stream_ollama_response(prompt: str, task_name: str, timings: dict = None):
+    """
+    Streams tokens from the Ollama API as they are generated.
+
+    If a `timings` dict is passed it is filled with 'ttft' (seconds to the
+    first token) and 'elapsed'. Breaking out of the `async for` closes the
+    connection, which stops generation on the server. Holds one request slot
+    for the whole stream.
+    """
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": f"You are a specialized {task_name}. {prompt}. Output only the result.",
+        "stream": True
+    }
+    timings = timings if timings is not None else {}
+
+    async with request_slots():
+        async for token in _stream_tokens(payload, timings):
+            yield token
+
+
+async def _stream_tokens(payload: dict, timings: dict):
+    """The streaming request itself; the caller holds a request slot."""
+    started = time.perf_counter()
+    async with get_client().stream("POST", OLLAMA_URL, json=payload) as response:
+        response.raise_for_status()
+        try:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response", "")
+                if token:
+                    timings.setdefault("ttft", time.perf_counter() - started)
+                    yield token
+                if chunk.get("done"):
+                    break
+        finally:
+            timings["elapsed"] = time.perf_counter() - started
+
+
+async def fetch_ollama_response(prompt: str, task_name: str, stream: bool = False,
+                                timeout: float = TASK_TIMEOUT_SECONDS) -> dict:
+    """
+    Asynchronously calls the Ollama API for a specific task.
+
+    The task gets `timeout` seconds once it holds a request slot (time spent
+    queued behind other tasks does not count). On timeout the request is
+    cancelled, which closes its connection and stops generation, and the
+    result carries an "error" instead of raising.
+    """
+    # Wait for a free request slot first, then start the task's clock
+    async with request_slots():
+        try:
+            return await asyncio.wait_for(_fetch(prompt, task_name, stream), timeout)
+        except asyncio.TimeoutError:
+            pass
+    print(f"⏱️ {task_name} timed out after {timeout:g}s, cancelled.")
+    return {"task_name": task_name, "result": None, "error": f"timed out after {timeout:g}s"}
+
+
+async def _fetch(prompt: str, task_name: str, stream: bool) -> dict:
+    """One task's request; the caller holds a request slot."""
     print(f"🤖 Starting {task_name}...")
+
+    if stream:
+        # Consume the token stream so we can report time-to-first-token
+        timings = {}
+        payload = {
+            "model": MODEL_NAME,
+            "prompt": f"You are a specialized {task_name}. {prompt}. Output only the result.",
+            "stream": True
+        }
+        tokens = [token async for token in _stream_tokens(payload, timings)]
+        print(f"✅ {task_name} finished (first token after {timings.get('ttft', 0):.2f}s).")
+        return {
+            "task_name": task_name,
+            "result": "".join(tokens) or "No response found",
+            "ttft": timings.get("ttft")
+        }
     
     # Payload for the Ollama /generate endpoint
     payload = {
@@ -19,20 +139,19 @@ async def fetch_ollama_response(prompt: str, task_name: str) -> dict:
         "stream": False 
     }
     
-    # Use httpx for asynchronous requests
-    async with httpx.AsyncClient(timeout=TIMEOUT_SECONDS) as client:
-        response = await client.post(OLLAMA_URL, json=payload)
-        response.raise_for_status()
-        
-        # Ollama returns a JSON response; extract the final 'response' field
-        data = response.json()
-        print(f"✅ {task_name} finished.")
-        return {
-            "task_name": task_name,
-            "result": data.get("response", "No response found")
-        }
+    # Reuse the shared client's connection pool
+    response = await get_client().post(OLLAMA_URL, json=payload)
+    response.raise_for_status()
+    
+    # Ollama returns a JSON response; extract the final 'response' field
+    data = response.json()
+    print(f"✅ {task_name} finished.")
+    return {
+        "task_name": task_name,
+        "result": data.get("response", "No response found")
+    }
 
-# --- 3. Coordinator/Aggregator Function ---
+# --- 4. Coordinator/Aggregator Function ---
 async def run_parallel_analysis(user_query: str):
     # --- Parallel Tasks Definition ---
     prompts_and_tasks = [
@@ -46,15 +165,17 @@ async def run_parallel_analysis(user_query: str):
         for prompt, task_name in prompts_and_tasks
     ]
     
-    # Run all tasks concurrently
+    # Run all tasks concurrently (at most OLLAMA_NUM_PARALLEL requests in flight)
     parallel_results = await asyncio.gather(*tasks)
+    reports = [r["result"] if r["result"] is not None else f"(unavailable: {r['error']})"
+               for r in parallel_results]
     
     # --- Aggregation (Final Ollama Call) ---
     aggregation_prompt = f"""
     You are the Final Investment Strategist. Synthesize the following two reports into a single, cohesive investment recommendation for Tesla.
     
-    1. Sentiment Report: {parallel_results[0]['result']}
-    2. Financial Risk Report: {parallel_results[1]['result']}
+    1. Sentiment Report: {reports[0]}
+    2. Financial Risk Report: {reports[1]}
     
     Provide a final 'BUY', 'HOLD', or 'SELL' recommendation and a brief justification.
     """
@@ -62,9 +183,15 @@ async def run_parallel_analysis(user_query: str):
     final_result = await fetch_ollama_response(aggregation_prompt, "Aggregator")
     return final_result
 
-# --- 4. Run the Workflow ---
+async def main(user_query: str):
+    try:
+        return await run_parallel_analysis(user_query)
+    finally:
+        await close_client()
+
+# --- 5. Run the Workflow ---
 if __name__ == "__main__":
      user_input = "Give me an investment summary for Tesla."
-     final_report = asyncio.run(run_parallel_analysis(user_input))
+     final_report = asyncio.run(main(user_input))
      print("\n--- Parallel/Aggregation Workflow Result ---")
      print(final_report['result'])
\ No newline at end of file